@@ -4,26 +4,46 @@ All public methods raise sqlite3.IntegrityError on constraint violations;
 callers that need idempotency must catch it explicitly.
 """
 
+import asyncio
 import sqlite3
 import logging
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, FrozenSet, Optional, List, Set, Tuple
 
 import aiosqlite
 
 logger = logging.getLogger(__name__)
 
+# Read-only aiosqlite connections; WAL lets them run alongside the writer.
+READER_POOL_SIZE = 3
+
+# daily_results.status codes.
+STATUS_YES, STATUS_NO, STATUS_MISSED = 0, 1, 2
+
 # ---------------------------------------------------------------------------
 # Schema
 # ---------------------------------------------------------------------------
 
-SCHEMA = """
+# Connection-level tuning.  WAL + synchronous=NORMAL is durable across app
+# crashes (only an OS crash can lose the last commits) and drops the fsync
+# from every write.
+PRAGMAS = """
 PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -64000;
+PRAGMA mmap_size = 268435456;
+PRAGMA busy_timeout = 5000;
+"""
+
+SCHEMA = """
 PRAGMA foreign_keys = ON;
 
 CREATE TABLE IF NOT EXISTS groups (
     group_id  INTEGER PRIMARY KEY,
     title     TEXT,
-    added_at  TEXT DEFAULT (datetime('now')),
+    added_at  TEXT DEFAULT CURRENT_TIMESTAMP,
     active    INTEGER DEFAULT 1
 );
 
@@ -42,7 +62,7 @@ CREATE TABLE IF NOT EXISTS participants (
     user_id      INTEGER,
     username     TEXT,
     display_name TEXT    NOT NULL,
-    joined_at    TEXT    DEFAULT (datetime('now')),
+    joined_at    TEXT    DEFAULT CURRENT_TIMESTAMP,
     active       INTEGER DEFAULT 1,
     pending      INTEGER DEFAULT 0   -- 1 while user_id is unknown
 );
@@ -63,24 +83,24 @@ CREATE TABLE IF NOT EXISTS polls (
     UNIQUE(group_id, poll_date)
 );
 
+-- votes and daily_results are keyed by their natural key and stored
+-- WITHOUT ROWID: rows live directly in the primary-key B-tree.
 CREATE TABLE IF NOT EXISTS votes (
-    id         INTEGER PRIMARY KEY AUTOINCREMENT,
     poll_id    INTEGER NOT NULL REFERENCES polls(id),
     user_id    INTEGER NOT NULL,
     option_idx INTEGER,                    -- 0=Yes  1=No  NULL=retracted
-    voted_at   TEXT DEFAULT (datetime('now')),
-    updated_at TEXT DEFAULT (datetime('now')),
-    UNIQUE(poll_id, user_id)
-);
+    voted_at   TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (poll_id, user_id)
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS daily_results (
-    id             INTEGER PRIMARY KEY AUTOINCREMENT,
     group_id       INTEGER NOT NULL REFERENCES groups(group_id),
     participant_id INTEGER NOT NULL REFERENCES participants(id),
     result_date    TEXT    NOT NULL,
-    status         TEXT    CHECK(status IN ('yes','no','missed')),
-    UNIQUE(group_id, participant_id, result_date)
-);
+    status         INTEGER NOT NULL CHECK(status BETWEEN 0 AND 2),  -- STATUS_*
+    PRIMARY KEY (group_id, participant_id, result_date)
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS weekly_results (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -94,8 +114,314 @@ CREATE TABLE IF NOT EXISTS weekly_results (
     rank_pos        INTEGER,
     UNIQUE(group_id, participant_id, week_start)
 );
+
+-- Covering indexes for the hot lookups.
+-- Roster / leaderboard driving table: active participants of one group.
+CREATE INDEX IF NOT EXISTS ix_participants_group_active
+    ON participants(group_id, active);
+
+-- Stats / leaderboards: per-participant date-range scan, status read from the index.
+CREATE INDEX IF NOT EXISTS ix_daily_results_pid_date
+    ON daily_results(participant_id, result_date, status);
+
+-- Case-insensitive @username lookups (add / remove / pending resolution).
+-- Queries repeat "username IS NOT NULL" so the planner can use this partial index.
+CREATE INDEX IF NOT EXISTS ix_participants_group_lower_username
+    ON participants(group_id, lower(username))
+    WHERE username IS NOT NULL;
+
+-- poll_answer correlation (every vote update looks up by Telegram poll id).
+CREATE INDEX IF NOT EXISTS ix_polls_tg
+    ON polls(tg_poll_id)
+    WHERE tg_poll_id IS NOT NULL;
+"""
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+# Kept as module constants so every call hands sqlite3 the identical string
+# object and hits its prepared-statement cache instead of re-parsing.
+
+# A group the bot was removed from (active = 0) becomes active again when it
+# is re-registered.
+SQL_UPSERT_GROUP = (
+    "INSERT INTO groups (group_id, title) VALUES (?, ?) "
+    "ON CONFLICT(group_id) DO UPDATE SET active = 1 WHERE active = 0"
+)
+
+SQL_INSERT_SETTINGS = "INSERT OR IGNORE INTO settings (group_id) VALUES (?)"
+
+SQL_DEACTIVATE_GROUP = "UPDATE groups SET active = 0 WHERE group_id = ?"
+
+SQL_DEACTIVATE_GROUP_CHALLENGE = "UPDATE settings SET challenge_active = 0 WHERE group_id = ?"
+
+SQL_GET_SETTINGS = (
+    "SELECT poll_time, reminder_time, challenge_active "
+    "FROM settings WHERE group_id = ?"
+)
+
+SQL_START_CHALLENGE = (
+    "UPDATE settings SET challenge_active = 1 "
+    "WHERE group_id = ? AND challenge_active = 0 "
+    "RETURNING poll_time, reminder_time"
+)
+
+SQL_STOP_CHALLENGE = (
+    "UPDATE settings SET challenge_active = 0 "
+    "WHERE group_id = ? AND challenge_active = 1 "
+    "RETURNING group_id"
+)
+
+SQL_SET_POLL_TIME = "UPDATE settings SET poll_time = ? WHERE group_id = ?"
+
+# ix_settings_active covers the settings side; the groups check skips groups
+# the bot has been removed from (get_or_create_group reactivates a re-added one).
+SQL_GET_ALL_ACTIVE_CHALLENGES = (
+    "SELECT group_id, poll_time, reminder_time "
+    "FROM settings WHERE challenge_active = 1 "
+    "AND EXISTS (SELECT 1 FROM groups g "
+    "WHERE g.group_id = settings.group_id AND g.active = 1)"
+)
+
+SQL_SET_REMINDER_TIME = "UPDATE settings SET reminder_time = ? WHERE group_id = ?"
+
+SQL_GET_PARTICIPANT_BY_USER = (
+    "SELECT id, active FROM participants WHERE group_id = ? AND user_id = ?"
+)
+
+# Expanded with one "lower(?)" placeholder per username.
+SQL_GET_PARTICIPANTS_BY_USERNAMES = (
+    "SELECT id, user_id, username FROM participants "
+    "WHERE group_id = ? AND username IS NOT NULL AND lower(username) IN ({})"
+)
+
+SQL_READD_KNOWN_PARTICIPANT = (
+    "UPDATE participants SET username=?, active=1, pending=0 WHERE id=?"
+)
+
+SQL_PROMOTE_PENDING_PARTICIPANT = (
+    "UPDATE participants "
+    "SET user_id=?, display_name=?, active=1, pending=0 "
+    "WHERE id = ("
+    "  SELECT id FROM participants "
+    "  WHERE group_id=? AND username IS NOT NULL AND lower(username)=lower(?) "
+    "  AND user_id IS NULL LIMIT 1"
+    ") AND NOT EXISTS ("
+    "  SELECT 1 FROM participants WHERE group_id=? AND user_id=?"
+    ") RETURNING id"
+)
+
+SQL_UPSERT_PARTICIPANT = (
+    "INSERT INTO participants "
+    "(group_id, user_id, username, display_name, active, pending) "
+    "VALUES (?, ?, ?, ?, 1, 0) "
+    "ON CONFLICT(group_id, user_id) WHERE user_id IS NOT NULL "
+    "DO UPDATE SET username=excluded.username, "
+    "  display_name=excluded.display_name, active=1, pending=0 "
+    "RETURNING id"
+)
+
+SQL_REACTIVATE_PARTICIPANT = "UPDATE participants SET active=1 WHERE id=?"
+
+SQL_INSERT_PENDING_PARTICIPANT = (
+    "INSERT INTO participants "
+    "(group_id, username, display_name, active, pending) "
+    "VALUES (?, ?, ?, 1, 1)"
+)
+
+SQL_FIND_PENDING_BY_USERNAME = (
+    "SELECT id FROM participants "
+    "WHERE group_id=? AND username IS NOT NULL AND lower(username)=lower(?) "
+    "AND user_id IS NULL AND pending=1"
+)
+
+SQL_GET_PENDING_USERNAMES = (
+    "SELECT lower(username) FROM participants "
+    "WHERE group_id=? AND username IS NOT NULL AND user_id IS NULL AND pending=1"
+)
+
+SQL_RESOLVE_PENDING = (
+    "UPDATE participants "
+    "SET user_id=?, display_name=?, pending=0 "
+    "WHERE id=?"
+)
+
+SQL_DEACTIVATE_BY_USER = (
+    "UPDATE participants SET active=0 "
+    "WHERE group_id=? AND user_id=? AND active=1 RETURNING id"
+)
+
+SQL_DEACTIVATE_BY_USERNAME = (
+    "UPDATE participants SET active=0 "
+    "WHERE group_id=? AND username IS NOT NULL AND lower(username)=lower(?) "
+    "AND active=1 RETURNING id"
+)
+
+# Leads with (user_id, username, display_name) for utils.format_mentions.
+SQL_GET_ACTIVE_PARTICIPANTS = (
+    "SELECT user_id, username, display_name, pending, id FROM participants "
+    "WHERE group_id=? AND active=1 "
+    "ORDER BY display_name COLLATE NOCASE"
+)
+
+SQL_INSERT_POLL_SLOT = (
+    "INSERT INTO polls (group_id, poll_date, posted_at) "
+    "VALUES (?, ?, CURRENT_TIMESTAMP)"
+)
+
+SQL_UPDATE_POLL_TELEGRAM_IDS = (
+    "UPDATE polls SET tg_poll_id=?, message_id=? "
+    "WHERE group_id=? AND poll_date=?"
+)
+
+SQL_GET_POLL_BY_TG_ID = "SELECT id, group_id FROM polls WHERE tg_poll_id=?"
+
+SQL_GET_POLL_BY_DATE = (
+    "SELECT id, tg_poll_id, message_id FROM polls WHERE group_id=? AND poll_date=?"
+)
+
+# Most vote events are re-votes, so a flushed batch (upsert_vote) runs the
+# UPDATE over every row first and only falls back to the INSERT when some
+# row was not touched; a re-vote keeps the original voted_at.
+# Both take params (option_idx, poll_id, user_id) for executemany.
+SQL_UPDATE_VOTE = (
+    "UPDATE votes SET option_idx=?1, updated_at=CURRENT_TIMESTAMP "
+    "WHERE poll_id=?2 AND user_id=?3"
+)
+
+SQL_INSERT_VOTE = (
+    "INSERT OR IGNORE INTO votes (poll_id, user_id, option_idx, voted_at, updated_at) "
+    "VALUES (?2, ?3, ?1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+)
+
+SQL_GET_UNVOTED_PARTICIPANTS = (
+    "SELECT p.user_id, p.username, p.display_name FROM participants p "
+    "JOIN polls po ON po.group_id = p.group_id AND po.poll_date = ? "
+    "LEFT JOIN votes v ON v.poll_id = po.id AND v.user_id = p.user_id "
+    "WHERE p.group_id = ? AND p.active = 1 AND p.user_id IS NOT NULL "
+    "AND (v.poll_id IS NULL OR v.option_idx IS NULL)"
+)
+
+# The 23:59 snapshot for a whole group in one statement: every active
+# participant gets yes/no from their vote on the poll, else missed (pending
+# participants, no vote, retracted vote, or no poll — poll_id NULL).
+# Params: result_date, poll_id, group_id.
+SQL_MATERIALIZE_DAILY_RESULTS = (
+    "INSERT INTO daily_results "
+    "(group_id, participant_id, result_date, status) "
+    "SELECT p.group_id, p.id, ?, "
+    f"  CASE WHEN v.option_idx IS NULL THEN {STATUS_MISSED} "
+    f"       WHEN v.option_idx = 0 THEN {STATUS_YES} ELSE {STATUS_NO} END "
+    "FROM participants p "
+    "LEFT JOIN votes v ON v.poll_id = ? AND v.user_id = p.user_id "
+    "WHERE p.group_id=? AND p.active=1 "
+    "ON CONFLICT(group_id, participant_id, result_date) "
+    "DO UPDATE SET status=excluded.status"
+)
+
+SQL_GET_TODAY_VOTE_FOR_USER = (
+    "SELECT v.option_idx, v.voted_at, p.message_id "
+    "FROM votes v "
+    "JOIN polls p ON p.id = v.poll_id "
+    "WHERE p.group_id=? AND p.poll_date=? AND v.user_id=?"
+)
+
+SQL_PARTICIPANT_STATS_RANGE = (
+    "SELECT "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_YES})    AS total_yes, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_NO})     AS total_no, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_MISSED}) AS total_missed "
+    "FROM daily_results "
+    "WHERE participant_id=? AND result_date BETWEEN ? AND ?"
+)
+
+# One statement text for every date-range leaderboard (weekly, monthly,
+# the /weekly_summary_now preview and the weekly snapshot below), so each
+# connection compiles it once and every caller runs the same plan.
+# Params: range_start, range_end, group_id.
+# Column order is relied on by utils.format_standings (positional unpack):
+# user_id, username, display_name, yes_count, no_count, missed_count, ...
+SQL_RANGE_LEADERBOARD = (
+    "SELECT p.user_id, p.username, p.display_name, "
+    f"  COUNT(dr.status) FILTER (WHERE dr.status={STATUS_YES})    AS yes_count, "
+    f"  COUNT(dr.status) FILTER (WHERE dr.status={STATUS_NO})     AS no_count, "
+    f"  COUNT(dr.status) FILTER (WHERE dr.status={STATUS_MISSED}) AS missed_count, "
+    "  p.id, p.group_id, p.joined_at "
+    "FROM participants p "
+    "LEFT JOIN daily_results dr "
+    "  ON dr.participant_id = p.id "
+    "  AND dr.result_date BETWEEN ? AND ? "
+    "WHERE p.group_id=? AND p.active=1 "
+    "GROUP BY p.id "
+    "ORDER BY yes_count DESC, p.display_name COLLATE NOCASE ASC"
+)
+
+# Week and all-time tallies in one index range scan.
+# Numbered params: ?1 participant_id, ?2 week_start, ?3 week_end.
+SQL_PARTICIPANT_STATS_COMBINED = (
+    "SELECT "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_YES} AND result_date BETWEEN ?2 AND ?3)    AS week_yes, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_NO} AND result_date BETWEEN ?2 AND ?3)     AS week_no, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_MISSED} AND result_date BETWEEN ?2 AND ?3) AS week_missed, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_YES})    AS total_yes, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_NO})     AS total_no, "
+    f"  COUNT(*) FILTER (WHERE status={STATUS_MISSED}) AS total_missed "
+    "FROM daily_results WHERE participant_id=?1"
+)
+
+SQL_WEEKLY_RESULT_EXISTS = (
+    "SELECT id FROM weekly_results "
+    "WHERE group_id=? AND week_start=? LIMIT 1"
+)
+
+# Same totals, rate and ordering as SQL_RANGE_LEADERBOARD, written in one pass.
+# Params: week_start, week_end, week_start, week_start, week_end, group_id.
+SQL_MATERIALIZE_WEEKLY_RESULTS = (
+    "INSERT OR IGNORE INTO weekly_results "
+    "(group_id, participant_id, week_start, "
+    " total_yes, total_no, total_missed, completion_rate, rank_pos) "
+    "SELECT group_id, id, ?, yes_count, no_count, missed_count, "
+    "  ROUND(yes_count * 100.0 / (julianday(?) - julianday(?) + 1), 2), "
+    "  ROW_NUMBER() OVER ("
+    "    ORDER BY yes_count DESC, display_name COLLATE NOCASE ASC"
+    "  ) "
+    "FROM (" + SQL_RANGE_LEADERBOARD + ")"
+)
+
+
+# Rebuild of a table whose stored layout predates SCHEMA: move it aside, let
+# SCHEMA create the new layout (and its indexes), copy the rows across.
+# One transaction.
+_REBUILD_TABLE = """
+BEGIN IMMEDIATE;
+{drop_indexes}
+ALTER TABLE {table} RENAME TO _{table}_old;
+{schema}
+INSERT INTO {table} ({columns}) SELECT {select} FROM _{table}_old;
+DROP TABLE _{table}_old;
+COMMIT;
 """
 
+# table -> (marker in the current CREATE TABLE, indexes to drop, columns,
+#           SELECT list reading the old table)
+_TABLE_REBUILDS = {
+    "votes": (
+        "WITHOUT ROWID",
+        ("ix_votes_poll_user",),
+        "poll_id, user_id, option_idx, voted_at, updated_at",
+        "poll_id, user_id, option_idx, voted_at, updated_at",
+    ),
+    "daily_results": (
+        "CHECK(status BETWEEN 0 AND 2)",
+        ("ix_daily_results_pid_date",),
+        "group_id, participant_id, result_date, status",
+        "group_id, participant_id, result_date, "
+        f"CASE status WHEN 'yes' THEN {STATUS_YES} WHEN 'no' THEN {STATUS_NO} "
+        f"ELSE {STATUS_MISSED} END",
+    ),
+}
+
 
 # ---------------------------------------------------------------------------
 # Database class
@@ -104,16 +430,82 @@ CREATE TABLE IF NOT EXISTS weekly_results (
 class Database:
     def __init__(self, path: str) -> None:
         self.path = path
-        self._conn: Optional[aiosqlite.Connection] = None
+        # One writer (all execute / transaction traffic) and a small pool of
+        # readers for fetchone / fetchall, so SELECTs never queue behind a write.
+        # Each connection keeps one long-lived cursor; the writer's is guarded
+        # by _write_lock and a reader's by being checked out of the queue.
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_cur: Optional[aiosqlite.Cursor] = None
+        self._readers: asyncio.Queue[aiosqlite.Cursor] = asyncio.Queue()
+        self._reader_conns: List[aiosqlite.Connection] = []
+        # Serialises writers so one coroutine's COMMIT never lands in the
+        # middle of another coroutine's transaction on the writer connection.
+        self._write_lock = asyncio.Lock()
+        # Plain sqlite3 connection + one dedicated thread for the hottest point
+        # reads: a single executor hop instead of aiosqlite's cursor round-trips.
+        self._sync_reader: Optional[sqlite3.Connection] = None
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        # get_settings cache, dropped by every settings writer.  The generation
+        # counter stops a read that raced a write from caching the old row.
+        self._settings_cache: Dict[int, Optional[aiosqlite.Row]] = {}
+        self._settings_gen = 0
+        # Groups whose groups/settings rows exist and are active
+        # (get_or_create_group); deactivate_group drops the id again.
+        self._known_groups: Set[int] = set()
+        # Active roster, pending usernames, leaderboard rows (per (start, end)
+        # range) and /stats tallies for each group, dropped whenever that
+        # group's participants or daily_results change; per-group generations
+        # guard against a read racing a write, as for settings.
+        self._participants_cache: Dict[int, List[aiosqlite.Row]] = {}
+        self._pending_cache: Dict[int, FrozenSet[str]] = {}
+        self._leaderboard_cache: Dict[int, Dict[Tuple[str, str], List[aiosqlite.Row]]] = {}
+        self._stats_cache: Dict[int, Dict[Tuple[int, str, str], Optional[aiosqlite.Row]]] = {}
+        self._roster_gen: Dict[int, int] = {}
+        # Poll rows are final once their Telegram IDs are set, so those are
+        # cached without invalidation: tg_poll_id -> (id, group_id) and
+        # (group_id, poll_date) -> (id, tg_poll_id, message_id).
+        self._polls_by_tg_id: Dict[str, aiosqlite.Row] = {}
+        self._polls_by_date: Dict[Tuple[int, str], aiosqlite.Row] = {}
+        # Votes waiting for the next group commit, each with the future its
+        # upsert_vote() caller is awaiting.
+        self._vote_batch: List[Tuple[tuple, asyncio.Future]] = []
+        self._vote_flushes: Set[asyncio.Task] = set()
 
     async def connect(self) -> None:
-        self._conn = await aiosqlite.connect(self.path)
-        self._conn.row_factory = aiosqlite.Row
-        await self._conn.executescript(SCHEMA)
-        await self._conn.commit()
+        self._writer = await self._open_connection()
+        self._writer_cur = await self._writer.cursor()
+        await self._writer.executescript(SCHEMA)
+        await self._writer.commit()
         await self._migrate()
+
+        for _ in range(READER_POOL_SIZE):
+            conn = await self._open_connection()
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(await conn.cursor())
+
+        self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-read")
+        self._sync_reader = await asyncio.get_running_loop().run_in_executor(
+            self._read_executor, self._open_sync_reader
+        )
         logger.info("Database connected: %s", self.path)
 
+    async def _open_connection(self) -> aiosqlite.Connection:
+        # Room for every SQL_* statement above in sqlite3's prepared-statement
+        # cache (default is 128, shared with ad-hoc queries).
+        conn = await aiosqlite.connect(self.path, cached_statements=256)
+        conn.row_factory = aiosqlite.Row
+        await conn.executescript(PRAGMAS)
+        return conn
+
+    def _open_sync_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None,
+            cached_statements=256,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.executescript(PRAGMAS)
+        return conn
+
     async def _migrate(self) -> None:
         """Apply schema migrations for existing databases."""
         try:
@@ -124,100 +516,238 @@ class Database:
         except Exception:
             pass  # Column already exists
 
+        # Needs reminder_time, so it is created after the column migration.
+        # Partial covering index for get_all_active_challenges.
+        await self.execute(
+            "CREATE INDEX IF NOT EXISTS ix_settings_active "
+            "ON settings(challenge_active, group_id, poll_time, reminder_time) "
+            "WHERE challenge_active = 1"
+        )
+
+        # deactivate_group clears challenge_active itself and
+        # get_all_active_challenges checks groups.active; databases created
+        # while this trigger was in SCHEMA still carry it.
+        await self.execute("DROP TRIGGER IF EXISTS trg_groups_deactivate")
+
+        for table, (marker, indexes, columns, select) in _TABLE_REBUILDS.items():
+            row = await self._fetchone_nocommit(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", table
+            )
+            if row is None or marker in row["sql"]:
+                continue
+            async with self._write_lock:
+                await self._writer.executescript(_REBUILD_TABLE.format(
+                    table=table,
+                    columns=columns,
+                    select=select,
+                    drop_indexes="".join(f"DROP INDEX IF EXISTS {ix};\n" for ix in indexes),
+                    schema=SCHEMA,
+                ))
+            logger.info("Migration: rebuilt %s to the current layout", table)
+
     async def close(self) -> None:
-        if self._conn:
-            await self._conn.close()
+        # Let queued votes commit before the writer goes away.  A non-empty
+        # _vote_batch always has a flush task, and a flush can start another.
+        while self._vote_flushes:
+            await asyncio.gather(*self._vote_flushes, return_exceptions=True)
+        if self._sync_reader:
+            await asyncio.get_running_loop().run_in_executor(
+                self._read_executor, self._sync_reader.close
+            )
+            self._read_executor.shutdown(wait=True)
+        for conn in self._reader_conns:
+            await conn.close()
+        if self._writer:
+            await self._writer.close()
 
     # -----------------------------------------------------------------------
     # Low-level helpers
     # -----------------------------------------------------------------------
 
     async def execute(self, query: str, *args) -> int:
-        """Run a write query, commit, return lastrowid."""
-        async with self._conn.execute(query, args) as cur:
-            await self._conn.commit()
-            return cur.lastrowid or 0
+        """Run a single write query, commit, return lastrowid."""
+        async with self._write_lock:
+            try:
+                await self._writer_cur.execute(query, args)
+            except BaseException:
+                # Don't leave the implicit transaction open for the next writer.
+                await self._writer.rollback()
+                raise
+            await self._writer.commit()
+            return self._writer_cur.lastrowid or 0
+
+    async def _exec_nocommit(self, query: str, *args) -> int:
+        """Run a write query inside the current transaction, return lastrowid."""
+        await self._writer_cur.execute(query, args)
+        return self._writer_cur.lastrowid or 0
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Group several _exec_nocommit() writes into one BEGIN IMMEDIATE … COMMIT
+        (a single WAL sync).  Rolls back if the block raises.
+        """
+        async with self._write_lock:
+            await self._writer_cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            await self._writer.commit()
+
+    async def execute_returning(self, query: str, *args) -> Optional[aiosqlite.Row]:
+        """Run a single write query with a RETURNING clause, commit, return its row."""
+        async with self._write_lock:
+            try:
+                row = await self._fetchone_nocommit(query, *args)
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            await self._writer.commit()
+            return row
+
+    async def _execmany_nocommit(self, query: str, seq_of_args: List[tuple]) -> None:
+        """executemany inside the current transaction; no-op for an empty batch."""
+        if seq_of_args:
+            await self._writer_cur.executemany(query, seq_of_args)
+
+    async def _fetchall_nocommit(self, query: str, *args) -> List[aiosqlite.Row]:
+        """Read on the writer, inside the current transaction."""
+        await self._writer_cur.execute(query, args)
+        return await self._writer_cur.fetchall()
+
+    async def _fetchone_nocommit(self, query: str, *args) -> Optional[aiosqlite.Row]:
+        """Read (or RETURNING write) on the writer, inside the current transaction."""
+        await self._writer_cur.execute(query, args)
+        # Drain so the statement is finished before any COMMIT.
+        rows = await self._writer_cur.fetchall()
+        return rows[0] if rows else None
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Cursor]:
+        cur = await self._readers.get()
+        try:
+            yield cur
+        finally:
+            self._readers.put_nowait(cur)
 
     async def fetchone(self, query: str, *args) -> Optional[aiosqlite.Row]:
-        async with self._conn.execute(query, args) as cur:
+        async with self._reader() as cur:
+            await cur.execute(query, args)
             return await cur.fetchone()
 
     async def fetchall(self, query: str, *args) -> List[aiosqlite.Row]:
-        async with self._conn.execute(query, args) as cur:
+        async with self._reader() as cur:
+            await cur.execute(query, args)
             return await cur.fetchall()
 
+    def _fetchone_sync(self, query: str, args: tuple) -> Optional[sqlite3.Row]:
+        return self._sync_reader.execute(query, args).fetchone()
+
+    async def fetchone_fast(self, query: str, *args) -> Optional[sqlite3.Row]:
+        """Read-only point query on the dedicated reader connection (sees committed data only)."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._read_executor, self._fetchone_sync, query, args
+        )
+
     # -----------------------------------------------------------------------
     # Groups & Settings
     # -----------------------------------------------------------------------
 
+    @asynccontextmanager
+    async def _settings_write(self, group_id: int) -> AsyncIterator[None]:
+        """Wrap a write to settings; invalidates the cached row once it's done."""
+        try:
+            yield
+        finally:
+            self._settings_cache.pop(group_id, None)
+            self._settings_gen += 1
+
     async def get_or_create_group(self, group_id: int, title: str) -> None:
-        await self.execute(
-            "INSERT OR IGNORE INTO groups (group_id, title) VALUES (?, ?)",
-            group_id, title,
-        )
-        await self.execute(
-            "INSERT OR IGNORE INTO settings (group_id) VALUES (?)",
-            group_id,
-        )
+        # Runs for every group message.  Group rows are never deleted, so
+        # once a group is known (and active) this process skips the write
+        # entirely; only a newly created settings row drops the cached one
+        # (a cached None).
+        if group_id in self._known_groups:
+            return
+        async with self.transaction():
+            await self._exec_nocommit(SQL_UPSERT_GROUP, group_id, title)
+            await self._exec_nocommit(SQL_INSERT_SETTINGS, group_id)
+            created = self._writer_cur.rowcount > 0
+        self._known_groups.add(group_id)
+        if created:
+            self._settings_cache.pop(group_id, None)
+            self._settings_gen += 1
 
     async def deactivate_group(self, group_id: int) -> None:
-        await self.execute(
-            "UPDATE groups SET active = 0 WHERE group_id = ?", group_id
-        )
-        await self.execute(
-            "UPDATE settings SET challenge_active = 0 WHERE group_id = ?", group_id
-        )
+        async with self._settings_write(group_id), self.transaction():
+            await self._exec_nocommit(SQL_DEACTIVATE_GROUP, group_id)
+            await self._exec_nocommit(SQL_DEACTIVATE_GROUP_CHALLENGE, group_id)
+        # Let the next get_or_create_group (bot re-added) reactivate the row.
+        self._known_groups.discard(group_id)
 
     async def get_settings(self, group_id: int) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT * FROM settings WHERE group_id = ?", group_id
-        )
+        try:
+            return self._settings_cache[group_id]
+        except KeyError:
+            pass
+        gen = self._settings_gen
+        row = await self.fetchone(SQL_GET_SETTINGS, group_id)
+        if gen == self._settings_gen:
+            self._settings_cache[group_id] = row
+        return row
 
-    async def set_challenge_active(self, group_id: int, active: bool) -> None:
-        await self.execute(
-            "UPDATE settings SET challenge_active = ? WHERE group_id = ?",
-            1 if active else 0, group_id,
-        )
+    async def start_challenge_returning(
+        self, group_id: int
+    ) -> Optional[aiosqlite.Row]:
+        """
+        Flip challenge_active 0 → 1 in one round-trip.
+        Returns (poll_time, reminder_time) on the transition; None if the
+        challenge was already running or the group has no settings row.
+        """
+        async with self._settings_write(group_id):
+            return await self.execute_returning(SQL_START_CHALLENGE, group_id)
+
+    async def stop_challenge(self, group_id: int) -> bool:
+        """Flip challenge_active 1 → 0. Returns False if it was not running."""
+        async with self._settings_write(group_id):
+            return await self.execute_returning(SQL_STOP_CHALLENGE, group_id) is not None
 
     async def set_poll_time(self, group_id: int, poll_time: str) -> None:
-        await self.execute(
-            "UPDATE settings SET poll_time = ? WHERE group_id = ?",
-            poll_time, group_id,
-        )
+        async with self._settings_write(group_id):
+            await self.execute(SQL_SET_POLL_TIME, poll_time, group_id)
 
     async def get_all_active_challenges(self) -> List[aiosqlite.Row]:
-        return await self.fetchall(
-            "SELECT g.group_id, s.poll_time, s.reminder_time "
-            "FROM groups g JOIN settings s ON s.group_id = g.group_id "
-            "WHERE s.challenge_active = 1 AND g.active = 1"
-        )
+        return await self.fetchall(SQL_GET_ALL_ACTIVE_CHALLENGES)
 
     async def set_reminder_time(self, group_id: int, reminder_time: str) -> None:
-        await self.execute(
-            "UPDATE settings SET reminder_time = ? WHERE group_id = ?",
-            reminder_time, group_id,
-        )
+        async with self._settings_write(group_id):
+            await self.execute(SQL_SET_REMINDER_TIME, reminder_time, group_id)
 
     # -----------------------------------------------------------------------
     # Participants
     # -----------------------------------------------------------------------
 
+    def _drop_roster_caches(self, group_id: int) -> None:
+        self._participants_cache.pop(group_id, None)
+        self._pending_cache.pop(group_id, None)
+        self._leaderboard_cache.pop(group_id, None)
+        self._stats_cache.pop(group_id, None)
+        self._roster_gen[group_id] = self._roster_gen.get(group_id, 0) + 1
+
+    @asynccontextmanager
+    async def _roster_write(self, group_id: int) -> AsyncIterator[None]:
+        """Wrap a write to participants / daily_results; drops the group's cached rows."""
+        try:
+            yield
+        finally:
+            self._drop_roster_caches(group_id)
+
     async def get_participant_by_user_id(
         self, group_id: int, user_id: int
     ) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT * FROM participants WHERE group_id = ? AND user_id = ?",
-            group_id, user_id,
-        )
-
-    async def get_participant_by_username(
-        self, group_id: int, username: str
-    ) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT * FROM participants "
-            "WHERE group_id = ? AND lower(username) = lower(?)",
-            group_id, username,
-        )
+        return await self.fetchone(SQL_GET_PARTICIPANT_BY_USER, group_id, user_id)
 
     async def upsert_participant(
         self,
@@ -227,49 +757,66 @@ class Database:
         display_name: str,
     ) -> int:
         """Add or reactivate a known participant. Returns participant id."""
-        existing = await self.get_participant_by_user_id(group_id, user_id)
-        if existing:
-            await self.execute(
-                "UPDATE participants "
-                "SET username=?, display_name=?, active=1, pending=0 "
-                "WHERE id=?",
-                username, display_name, existing["id"],
-            )
-            return existing["id"]
-
-        # Resolve a pending record that was added by @username
-        if username:
-            pending = await self.get_participant_by_username(group_id, username)
-            if pending and pending["user_id"] is None:
-                await self.execute(
-                    "UPDATE participants "
-                    "SET user_id=?, display_name=?, active=1, pending=0 "
-                    "WHERE id=?",
-                    user_id, display_name, pending["id"],
+        async with self._roster_write(group_id), self.transaction():
+            # Resolve a pending record that was added by @username — only when
+            # this user_id has no row of its own yet.
+            if username:
+                row = await self._fetchone_nocommit(
+                    SQL_PROMOTE_PENDING_PARTICIPANT,
+                    user_id, display_name, group_id, username, group_id, user_id,
                 )
-                return pending["id"]
+                if row:
+                    return row["id"]
 
-        return await self.execute(
-            "INSERT INTO participants "
-            "(group_id, user_id, username, display_name, active, pending) "
-            "VALUES (?, ?, ?, ?, 1, 0)",
-            group_id, user_id, username, display_name,
-        )
+            row = await self._fetchone_nocommit(
+                SQL_UPSERT_PARTICIPANT,
+                group_id, user_id, username, display_name,
+            )
+            return row["id"]
 
-    async def add_pending_participant(self, group_id: int, username: str) -> int:
-        """Add a participant by username only; user_id to be resolved later."""
-        existing = await self.get_participant_by_username(group_id, username)
-        if existing:
-            await self.execute(
-                "UPDATE participants SET active=1 WHERE id=?", existing["id"]
+    async def add_participants_by_usernames(
+        self, group_id: int, usernames: List[str]
+    ) -> List[bool]:
+        """
+        Bulk /addall in one transaction.  Usernames already tied to a user_id
+        are re-activated; the rest are added (or re-activated) as pending.
+        Returns, per input username, True if it was a known user.
+        """
+        async with self._roster_write(group_id), self.transaction():
+            rows = await self._fetchall_nocommit(
+                SQL_GET_PARTICIPANTS_BY_USERNAMES.format(
+                    ", ".join("lower(?)" for _ in usernames)
+                ),
+                group_id, *usernames,
             )
-            return existing["id"]
-        return await self.execute(
-            "INSERT INTO participants "
-            "(group_id, username, display_name, active, pending) "
-            "VALUES (?, ?, ?, 1, 1)",
-            group_id, username, username,
-        )
+            # Prefer a resolved row when a username has both kinds.
+            by_name = {}
+            for row in sorted(rows, key=lambda r: r["user_id"] is not None):
+                by_name[row["username"].lower()] = row
+
+            known, reactivate, new = [], [], {}
+            result = []
+            for username in usernames:
+                row = by_name.get(username.lower())
+                if row is not None and row["user_id"]:
+                    known.append((username, row["id"]))
+                elif row is not None:
+                    reactivate.append((row["id"],))
+                else:
+                    new.setdefault(username.lower(), (group_id, username, username))
+                result.append(row is not None and bool(row["user_id"]))
+
+            await self._execmany_nocommit(SQL_READD_KNOWN_PARTICIPANT, known)
+            await self._execmany_nocommit(SQL_REACTIVATE_PARTICIPANT, reactivate)
+            await self._execmany_nocommit(
+                SQL_INSERT_PENDING_PARTICIPANT, list(new.values())
+            )
+            return result
+
+    async def add_participant_by_username(self, group_id: int, username: str) -> bool:
+        """Single-name add_participants_by_usernames. True if it was a known user."""
+        (known,) = await self.add_participants_by_usernames(group_id, [username])
+        return known
 
     async def resolve_pending_by_username(
         self,
@@ -279,51 +826,61 @@ class Database:
         display_name: str,
     ) -> bool:
         """Fill in user_id for a pending participant. Returns True if resolved."""
-        row = await self.fetchone(
-            "SELECT id FROM participants "
-            "WHERE group_id=? AND lower(username)=lower(?) "
-            "AND user_id IS NULL AND pending=1",
-            group_id, username,
-        )
-        if row:
-            await self.execute(
-                "UPDATE participants "
-                "SET user_id=?, display_name=?, pending=0 "
-                "WHERE id=?",
+        # Checked on every group message: answer the usual "not pending" from
+        # memory instead of taking the write lock.
+        pending = self._pending_cache.get(group_id)
+        if pending is None:
+            gen = self._roster_gen.get(group_id, 0)
+            pending = frozenset(
+                r[0] for r in await self.fetchall(SQL_GET_PENDING_USERNAMES, group_id)
+            )
+            if gen == self._roster_gen.get(group_id, 0):
+                self._pending_cache[group_id] = pending
+        if username.lower() not in pending:
+            return False
+
+        async with self.transaction():
+            row = await self._fetchone_nocommit(
+                SQL_FIND_PENDING_BY_USERNAME, group_id, username
+            )
+            if not row:
+                return False
+            await self._exec_nocommit(
+                SQL_RESOLVE_PENDING,
                 user_id, display_name, row["id"],
             )
-            return True
-        return False
+        # Only a real resolution drops the cached roster and leaderboards.
+        self._drop_roster_caches(group_id)
+        return True
 
     async def deactivate_participant_by_user_id(
         self, group_id: int, user_id: int
     ) -> bool:
-        p = await self.get_participant_by_user_id(group_id, user_id)
-        if not p or not p["active"]:
-            return False
-        await self.execute(
-            "UPDATE participants SET active=0 WHERE id=?", p["id"]
-        )
-        return True
+        """Returns False if there was no active participant to remove."""
+        async with self._roster_write(group_id):
+            row = await self.execute_returning(SQL_DEACTIVATE_BY_USER, group_id, user_id)
+        return row is not None
 
     async def deactivate_participant_by_username(
         self, group_id: int, username: str
     ) -> bool:
-        p = await self.get_participant_by_username(group_id, username)
-        if not p or not p["active"]:
-            return False
-        await self.execute(
-            "UPDATE participants SET active=0 WHERE id=?", p["id"]
-        )
-        return True
+        """Returns False if there was no active participant to remove."""
+        async with self._roster_write(group_id):
+            row = await self.execute_returning(
+                SQL_DEACTIVATE_BY_USERNAME, group_id, username
+            )
+        return row is not None
 
     async def get_active_participants(self, group_id: int) -> List[aiosqlite.Row]:
-        return await self.fetchall(
-            "SELECT * FROM participants "
-            "WHERE group_id=? AND active=1 "
-            "ORDER BY display_name COLLATE NOCASE",
-            group_id,
-        )
+        try:
+            return self._participants_cache[group_id]
+        except KeyError:
+            pass
+        gen = self._roster_gen.get(group_id, 0)
+        rows = await self.fetchall(SQL_GET_ACTIVE_PARTICIPANTS, group_id)
+        if gen == self._roster_gen.get(group_id, 0):
+            self._participants_cache[group_id] = rows
+        return rows
 
     # -----------------------------------------------------------------------
     # Polls
@@ -334,11 +891,7 @@ class Database:
     ) -> Optional[int]:
         """Reserve today's poll slot. Returns poll id on success, None if already exists."""
         try:
-            return await self.execute(
-                "INSERT INTO polls (group_id, poll_date, posted_at) "
-                "VALUES (?, ?, datetime('now'))",
-                group_id, poll_date,
-            )
+            return await self.execute(SQL_INSERT_POLL_SLOT, group_id, poll_date)
         except sqlite3.IntegrityError:
             return None
 
@@ -350,23 +903,39 @@ class Database:
         message_id: int,
     ) -> None:
         await self.execute(
-            "UPDATE polls SET tg_poll_id=?, message_id=? "
-            "WHERE group_id=? AND poll_date=?",
+            SQL_UPDATE_POLL_TELEGRAM_IDS,
             tg_poll_id, message_id, group_id, poll_date,
         )
 
     async def get_poll_by_tg_id(self, tg_poll_id: str) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT * FROM polls WHERE tg_poll_id=?", tg_poll_id
-        )
+        """Runs for every poll answer; found polls are kept in memory."""
+        try:
+            return self._polls_by_tg_id[tg_poll_id]
+        except KeyError:
+            pass
+        row = await self.fetchone_fast(SQL_GET_POLL_BY_TG_ID, tg_poll_id)
+        # Misses aren't cached: an answer can race update_poll_telegram_ids.
+        if row is not None:
+            if len(self._polls_by_tg_id) >= 4096:
+                self._polls_by_tg_id.clear()
+            self._polls_by_tg_id[tg_poll_id] = row
+        return row
 
     async def get_poll_by_date(
         self, group_id: int, poll_date: str
     ) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT * FROM polls WHERE group_id=? AND poll_date=?",
-            group_id, poll_date,
-        )
+        key = (group_id, poll_date)
+        try:
+            return self._polls_by_date[key]
+        except KeyError:
+            pass
+        row = await self.fetchone(SQL_GET_POLL_BY_DATE, group_id, poll_date)
+        # A reserved slot still gets its Telegram IDs; only cache it after.
+        if row is not None and row["tg_poll_id"]:
+            if len(self._polls_by_date) >= 4096:
+                self._polls_by_date.clear()
+            self._polls_by_date[key] = row
+        return row
 
     # -----------------------------------------------------------------------
     # Votes
@@ -375,61 +944,60 @@ class Database:
     async def upsert_vote(
         self, poll_id: int, user_id: int, option_idx: Optional[int]
     ) -> None:
-        await self.execute(
-            "INSERT INTO votes (poll_id, user_id, option_idx, voted_at, updated_at) "
-            "VALUES (?, ?, ?, datetime('now'), datetime('now')) "
-            "ON CONFLICT(poll_id, user_id) DO UPDATE SET "
-            "  option_idx=excluded.option_idx, updated_at=datetime('now')",
-            poll_id, user_id, option_idx,
-        )
+        """
+        Record a vote; returns once it is committed.  Votes arriving while
+        the writer is busy are group-committed: the burst after a poll opens
+        costs one transaction per flush instead of one per voter.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._vote_batch.append(((poll_id, user_id, option_idx), fut))
+        if len(self._vote_batch) == 1:
+            task = asyncio.create_task(self._flush_votes())
+            self._vote_flushes.add(task)
+            task.add_done_callback(self._vote_flushes.discard)
+        await fut
 
-    async def get_vote(self, poll_id: int, user_id: int) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT * FROM votes WHERE poll_id=? AND user_id=?",
-            poll_id, user_id,
-        )
+    async def _flush_votes(self) -> None:
+        batch = None
+        try:
+            async with self.transaction():
+                # Taken under the write lock, so everything queued while
+                # waiting for it goes into this one commit.
+                batch, self._vote_batch = self._vote_batch, []
+                # Last answer per (poll, user) wins, so two answers from one
+                # voter in a batch can't both fall through to the INSERT.
+                latest = {(poll_id, user_id): (option_idx, poll_id, user_id)
+                          for (poll_id, user_id, option_idx), _ in batch}
+                rows = list(latest.values())
+                await self._execmany_nocommit(SQL_UPDATE_VOTE, rows)
+                if self._writer_cur.rowcount < len(rows):
+                    await self._execmany_nocommit(SQL_INSERT_VOTE, rows)
+        except Exception as exc:
+            if batch is None:
+                batch, self._vote_batch = self._vote_batch, []
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_result(None)
 
     async def get_unvoted_participants(
         self, group_id: int, poll_date: str
     ) -> List[aiosqlite.Row]:
         """Active participants who haven't cast a valid vote in today's poll."""
-        return await self.fetchall(
-            "SELECT p.* FROM participants p "
-            "JOIN polls po ON po.group_id = p.group_id AND po.poll_date = ? "
-            "LEFT JOIN votes v ON v.poll_id = po.id AND v.user_id = p.user_id "
-            "WHERE p.group_id = ? AND p.active = 1 AND p.user_id IS NOT NULL "
-            "AND (v.id IS NULL OR v.option_idx IS NULL)",
-            poll_date, group_id,
-        )
+        return await self.fetchall(SQL_GET_UNVOTED_PARTICIPANTS, poll_date, group_id)
 
     # -----------------------------------------------------------------------
     # Daily Results
     # -----------------------------------------------------------------------
 
-    async def upsert_daily_result(
-        self,
-        group_id: int,
-        participant_id: int,
-        result_date: str,
-        status: str,
-    ) -> None:
-        await self.execute(
-            "INSERT INTO daily_results "
-            "(group_id, participant_id, result_date, status) "
-            "VALUES (?, ?, ?, ?) "
-            "ON CONFLICT(group_id, participant_id, result_date) "
-            "DO UPDATE SET status=excluded.status",
-            group_id, participant_id, result_date, status,
-        )
-
     async def get_today_vote_for_user(
         self, group_id: int, user_id: int, today: str
     ) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT v.option_idx, v.voted_at, p.message_id "
-            "FROM votes v "
-            "JOIN polls p ON p.id = v.poll_id "
-            "WHERE p.group_id=? AND p.poll_date=? AND v.user_id=?",
+        return await self.fetchone_fast(
+            SQL_GET_TODAY_VOTE_FOR_USER,
             group_id, today, user_id,
         )
 
@@ -437,66 +1005,57 @@ class Database:
     # Stats (computed from daily_results)
     # -----------------------------------------------------------------------
 
-    async def get_participant_stats_alltime(
-        self, participant_id: int
+    async def get_participant_stats_weekly(
+        self, participant_id: int, week_start: str, week_end: str
     ) -> Optional[aiosqlite.Row]:
         return await self.fetchone(
-            "SELECT "
-            "  COALESCE(SUM(CASE WHEN status='yes'    THEN 1 ELSE 0 END), 0) AS total_yes, "
-            "  COALESCE(SUM(CASE WHEN status='no'     THEN 1 ELSE 0 END), 0) AS total_no, "
-            "  COALESCE(SUM(CASE WHEN status='missed' THEN 1 ELSE 0 END), 0) AS total_missed "
-            "FROM daily_results WHERE participant_id=?",
-            participant_id,
+            SQL_PARTICIPANT_STATS_RANGE,
+            participant_id, week_start, week_end,
         )
 
-    async def get_participant_stats_weekly(
-        self, participant_id: int, week_start: str, week_end: str
+    async def get_participant_stats_combined(
+        self, group_id: int, participant_id: int, week_start: str, week_end: str
     ) -> Optional[aiosqlite.Row]:
-        return await self.fetchone(
-            "SELECT "
-            "  COALESCE(SUM(CASE WHEN status='yes'    THEN 1 ELSE 0 END), 0) AS total_yes, "
-            "  COALESCE(SUM(CASE WHEN status='no'     THEN 1 ELSE 0 END), 0) AS total_no, "
-            "  COALESCE(SUM(CASE WHEN status='missed' THEN 1 ELSE 0 END), 0) AS total_missed "
-            "FROM daily_results "
-            "WHERE participant_id=? AND result_date BETWEEN ? AND ?",
+        """
+        week_yes / week_no / week_missed plus the all-time total_* in one read.
+        daily_results only changes at the 23:59 snapshot, so the row is kept
+        until the next write to the group.
+        """
+        key = (participant_id, week_start, week_end)
+        try:
+            return self._stats_cache[group_id][key]
+        except KeyError:
+            pass
+        gen = self._roster_gen.get(group_id, 0)
+        row = await self.fetchone(
+            SQL_PARTICIPANT_STATS_COMBINED,
             participant_id, week_start, week_end,
         )
+        if gen == self._roster_gen.get(group_id, 0):
+            self._stats_cache.setdefault(group_id, {})[key] = row
+        return row
+
+    async def _range_leaderboard(
+        self, group_id: int, start: str, end: str
+    ) -> List[aiosqlite.Row]:
+        cached = self._leaderboard_cache.get(group_id, {}).get((start, end))
+        if cached is not None:
+            return cached
+        gen = self._roster_gen.get(group_id, 0)
+        rows = await self.fetchall(SQL_RANGE_LEADERBOARD, start, end, group_id)
+        if gen == self._roster_gen.get(group_id, 0):
+            self._leaderboard_cache.setdefault(group_id, {})[(start, end)] = rows
+        return rows
 
     async def get_weekly_leaderboard(
         self, group_id: int, week_start: str, week_end: str
     ) -> List[aiosqlite.Row]:
-        return await self.fetchall(
-            "SELECT p.id, p.display_name, p.user_id, p.username, p.joined_at, "
-            "  COALESCE(SUM(CASE WHEN dr.status='yes'    THEN 1 ELSE 0 END), 0) AS yes_count, "
-            "  COALESCE(SUM(CASE WHEN dr.status='no'     THEN 1 ELSE 0 END), 0) AS no_count, "
-            "  COALESCE(SUM(CASE WHEN dr.status='missed' THEN 1 ELSE 0 END), 0) AS missed_count "
-            "FROM participants p "
-            "LEFT JOIN daily_results dr "
-            "  ON dr.participant_id = p.id "
-            "  AND dr.result_date BETWEEN ? AND ? "
-            "WHERE p.group_id=? AND p.active=1 "
-            "GROUP BY p.id "
-            "ORDER BY yes_count DESC, p.display_name COLLATE NOCASE ASC",
-            week_start, week_end, group_id,
-        )
+        return await self._range_leaderboard(group_id, week_start, week_end)
 
     async def get_monthly_leaderboard(
         self, group_id: int, month_start: str, month_end: str
     ) -> List[aiosqlite.Row]:
-        return await self.fetchall(
-            "SELECT p.id, p.display_name, p.user_id, p.username, "
-            "  COALESCE(SUM(CASE WHEN dr.status='yes'    THEN 1 ELSE 0 END), 0) AS yes_count, "
-            "  COALESCE(SUM(CASE WHEN dr.status='no'     THEN 1 ELSE 0 END), 0) AS no_count, "
-            "  COALESCE(SUM(CASE WHEN dr.status='missed' THEN 1 ELSE 0 END), 0) AS missed_count "
-            "FROM participants p "
-            "LEFT JOIN daily_results dr "
-            "  ON dr.participant_id = p.id "
-            "  AND dr.result_date BETWEEN ? AND ? "
-            "WHERE p.group_id=? AND p.active=1 "
-            "GROUP BY p.id "
-            "ORDER BY yes_count DESC, p.display_name COLLATE NOCASE ASC",
-            month_start, month_end, group_id,
-        )
+        return await self._range_leaderboard(group_id, month_start, month_end)
 
     # -----------------------------------------------------------------------
     # Weekly Results
@@ -505,29 +1064,28 @@ class Database:
     async def check_weekly_result_exists(
         self, group_id: int, week_start: str
     ) -> bool:
-        row = await self.fetchone(
-            "SELECT id FROM weekly_results "
-            "WHERE group_id=? AND week_start=? LIMIT 1",
-            group_id, week_start,
-        )
+        row = await self.fetchone(SQL_WEEKLY_RESULT_EXISTS, group_id, week_start)
         return row is not None
 
-    async def insert_weekly_result(
-        self,
-        group_id: int,
-        participant_id: int,
-        week_start: str,
-        total_yes: int,
-        total_no: int,
-        total_missed: int,
-        completion_rate: float,
-        rank_pos: int,
+    async def materialize_daily_results(
+        self, group_id: int, result_date: str, poll_id: Optional[int]
+    ) -> int:
+        """
+        Snapshot every active participant's status for result_date in one
+        INSERT … SELECT.  poll_id None (no poll posted) marks everyone missed.
+        Returns the number of participants recorded.
+        """
+        async with self._roster_write(group_id), self.transaction():
+            await self._exec_nocommit(
+                SQL_MATERIALIZE_DAILY_RESULTS, result_date, poll_id, group_id
+            )
+            return self._writer_cur.rowcount
+
+    async def materialize_weekly_results(
+        self, group_id: int, week_start: str, week_end: str
     ) -> None:
+        """Aggregate daily_results and snapshot the whole week in one INSERT … SELECT."""
         await self.execute(
-            "INSERT OR IGNORE INTO weekly_results "
-            "(group_id, participant_id, week_start, "
-            " total_yes, total_no, total_missed, completion_rate, rank_pos) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            group_id, participant_id, week_start,
-            total_yes, total_no, total_missed, completion_rate, rank_pos,
+            SQL_MATERIALIZE_WEEKLY_RESULTS,
+            week_start, week_end, week_start, week_start, week_end, group_id,
         )
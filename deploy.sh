@@ -23,6 +23,9 @@ python3 -m venv .venv
 .venv/bin/pip install --upgrade pip -q
 .venv/bin/pip install -r requirements.txt -q
 
+echo "==> Precompiling bot modules..."
+.venv/bin/python -m compileall -q *.py handlers
+
 echo "==> Installing systemd service..."
 sudo cp reading_challenge_bot.service /etc/systemd/system/
 sudo systemctl daemon-reload
@@ -11,6 +11,7 @@ Commands:
   /weekly_summary_now
 """
 
+import asyncio
 import re
 import logging
 
@@ -20,19 +21,50 @@ from aiogram.types import Message
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from db import Database
-from jobs import post_weekly_summary, remove_group_jobs, schedule_group_jobs, send_poll_reminder
-from middleware import IsAdmin, IsGroup
-from utils import format_mention, get_almaty_today, get_current_month_bounds
+from jobs import (
+    post_weekly_summary,
+    preview_week_bounds,
+    remove_group_jobs,
+    schedule_group_jobs,
+    send_poll_reminder,
+)
+from middleware import IsAdmin, IsGroup, LooksLikeCommand
+from utils import (
+    format_mention,
+    format_mentions,
+    format_standings,
+    get_almaty_today,
+    get_current_month_bounds,
+    reply_chunked,
+)
 
 logger = logging.getLogger(__name__)
 router = Router()
+# Checked once per message for the whole router: only group commands get
+# as far as the per-handler Command() filters.
+router.message.filter(IsGroup(), LooksLikeCommand())
+
+# Bound fullmatch of the precompiled pattern; accepts H:MM and HH:MM.
+# Matches are stored zero-padded (raw.zfill(5)) so "9:00" and "09:00"
+# are the same setting.
+_HHMM_RE = re.compile(r"([01]?\d|2[0-3]):[0-5]\d").fullmatch
+
+# Footnotes explaining the ⏳ marker in /participants and /addall replies.
+_PENDING_NOTE = (
+    "\n\n<i>⏳ = pending (user_id not yet resolved; "
+    "they need to send a message or use /join)</i>"
+)
+_ADDALL_PENDING_NOTE = (
+    "\n<i>⏳ — user_id әлі белгісіз. "
+    "Топта хабар жіберсе немесе /join пайдаланса тіркеледі.</i>"
+)
 
 
 # ---------------------------------------------------------------------------
 # /challenge_start
 # ---------------------------------------------------------------------------
 
-@router.message(Command("challenge_start"), IsGroup(), IsAdmin())
+@router.message(Command("challenge_start"), IsAdmin())
 async def cmd_challenge_start(
     msg: Message,
     db: Database,
@@ -40,21 +72,20 @@ async def cmd_challenge_start(
     bot: Bot,
 ) -> None:
     group_id = msg.chat.id
-    settings = await db.get_settings(group_id)
+    settings = await db.start_challenge_returning(group_id)
 
-    if not settings:
-        await msg.reply("❌ Group not initialised yet. Try again in a moment.")
-        return
-
-    if settings["challenge_active"]:
+    if settings is None:
+        # No transition happened — find out why (rare path).
+        settings = await db.get_settings(group_id)
+        if not settings:
+            await msg.reply("❌ Group not initialised yet. Try again in a moment.", parse_mode=None)
+            return
         await msg.reply(
             f"ℹ️ Challenge is already running. "
             f"Daily poll at <b>{settings['poll_time']}</b> (Asia/Almaty).",
-            parse_mode="HTML",
         )
         return
 
-    await db.set_challenge_active(group_id, True)
     schedule_group_jobs(
         scheduler, group_id, settings["poll_time"], bot, db,
         reminder_time=settings["reminder_time"],
@@ -68,7 +99,6 @@ async def cmd_challenge_start(
         f"✅ Daily reading challenge started!\n"
         f"📅 Poll at <b>{settings['poll_time']}</b> (Asia/Almaty) every day.{reminder_line}\n\n"
         f"Use /join to attend the poll and become a participant of this challenge.",
-        parse_mode="HTML",
     )
 
 
@@ -76,29 +106,30 @@ async def cmd_challenge_start(
 # /challenge_stop
 # ---------------------------------------------------------------------------
 
-@router.message(Command("challenge_stop"), IsGroup(), IsAdmin())
+@router.message(Command("challenge_stop"), IsAdmin())
 async def cmd_challenge_stop(
     msg: Message,
     db: Database,
     scheduler: AsyncIOScheduler,
 ) -> None:
     group_id = msg.chat.id
-    settings = await db.get_settings(group_id)
 
-    if not settings or not settings["challenge_active"]:
-        await msg.reply("ℹ️ Challenge is not running.")
+    if not await db.stop_challenge(group_id):
+        await msg.reply("ℹ️ Challenge is not running.", parse_mode=None)
         return
 
-    await db.set_challenge_active(group_id, False)
     remove_group_jobs(scheduler, group_id)
-    await msg.reply("⏸ Challenge paused. All data is preserved. Use /challenge_start to resume.")
+    await msg.reply(
+        "⏸ Challenge paused. All data is preserved. Use /challenge_start to resume.",
+        parse_mode=None,
+    )
 
 
 # ---------------------------------------------------------------------------
 # /set_time HH:MM
 # ---------------------------------------------------------------------------
 
-@router.message(Command("set_time"), IsGroup(), IsAdmin())
+@router.message(Command("set_time"), IsAdmin())
 async def cmd_set_time(
     msg: Message,
     db: Database,
@@ -109,13 +140,18 @@ async def cmd_set_time(
     group_id = msg.chat.id
     raw = (command.args or "").strip()
 
-    if not re.fullmatch(r"([01]?\d|2[0-3]):[0-5]\d", raw):
-        await msg.reply("❌ Invalid format. Example: <code>/set_time 20:00</code>", parse_mode="HTML")
+    if not _HHMM_RE(raw):
+        await msg.reply("❌ Invalid format. Example: <code>/set_time 20:00</code>")
         return
 
-    poll_time = raw
-    settings = await db.get_settings(group_id)
-    await db.set_poll_time(group_id, poll_time)
+    poll_time = raw.zfill(5)
+    # The read goes to the reader pool and doesn't look at poll_time, so it
+    # can overlap the write.  schedule_group_jobs stays on the loop thread:
+    # AsyncIOScheduler isn't thread-safe.
+    settings, _ = await asyncio.gather(
+        db.get_settings(group_id),
+        db.set_poll_time(group_id, poll_time),
+    )
 
     if settings and settings["challenge_active"]:
         schedule_group_jobs(
@@ -124,13 +160,11 @@ async def cmd_set_time(
         )
         await msg.reply(
             f"✅ Poll time updated to <b>{poll_time}</b> (Asia/Almaty). Jobs rescheduled.",
-            parse_mode="HTML",
         )
     else:
         await msg.reply(
             f"✅ Poll time set to <b>{poll_time}</b> (Asia/Almaty). "
             f"Start the challenge with /challenge_start.",
-            parse_mode="HTML",
         )
 
 
@@ -138,7 +172,7 @@ async def cmd_set_time(
 # /set_reminder_time HH:MM
 # ---------------------------------------------------------------------------
 
-@router.message(Command("set_reminder_time"), IsGroup(), IsAdmin())
+@router.message(Command("set_reminder_time"), IsAdmin())
 async def cmd_set_reminder_time(
     msg: Message,
     db: Database,
@@ -149,16 +183,17 @@ async def cmd_set_reminder_time(
     group_id = msg.chat.id
     raw = (command.args or "").strip()
 
-    if not re.fullmatch(r"([01]?\d|2[0-3]):[0-5]\d", raw):
+    if not _HHMM_RE(raw):
         await msg.reply(
             "❌ Invalid format. Example: <code>/set_reminder_time 22:00</code>",
-            parse_mode="HTML",
         )
         return
 
-    reminder_time = raw
-    settings = await db.get_settings(group_id)
-    await db.set_reminder_time(group_id, reminder_time)
+    reminder_time = raw.zfill(5)
+    settings, _ = await asyncio.gather(
+        db.get_settings(group_id),
+        db.set_reminder_time(group_id, reminder_time),
+    )
 
     if settings and settings["challenge_active"]:
         schedule_group_jobs(
@@ -168,13 +203,11 @@ async def cmd_set_reminder_time(
         await msg.reply(
             f"✅ Reminder time set to <b>{reminder_time}</b> (Asia/Almaty).\n"
             f"Participants who haven't voted by this time will be tagged.",
-            parse_mode="HTML",
         )
     else:
         await msg.reply(
             f"✅ Reminder time set to <b>{reminder_time}</b> (Asia/Almaty). "
             f"Start the challenge with /challenge_start.",
-            parse_mode="HTML",
         )
 
 
@@ -182,9 +215,9 @@ async def cmd_set_reminder_time(
 # /reminder_now  (manual trigger for testing)
 # ---------------------------------------------------------------------------
 
-@router.message(Command("reminder_now"), IsGroup(), IsAdmin())
+@router.message(Command("reminder_now"), IsAdmin())
 async def cmd_reminder_now(msg: Message, db: Database, bot: Bot) -> None:
-    await msg.reply("⏰ Sending reminder to unvoted participants…")
+    await msg.reply("⏰ Sending reminder to unvoted participants…", parse_mode=None)
     await send_poll_reminder(msg.chat.id, bot, db)
 
 
@@ -192,7 +225,7 @@ async def cmd_reminder_now(msg: Message, db: Database, bot: Bot) -> None:
 # /add  (reply or @username)
 # ---------------------------------------------------------------------------
 
-@router.message(Command("add"), IsGroup(), IsAdmin())
+@router.message(Command("add"), IsAdmin())
 async def cmd_add(
     msg: Message,
     db: Database,
@@ -204,14 +237,14 @@ async def cmd_add(
     if msg.reply_to_message and msg.reply_to_message.from_user:
         target = msg.reply_to_message.from_user
         if target.is_bot:
-            await msg.reply("❌ Cannot add a bot as a participant.")
+            await msg.reply("❌ Cannot add a bot as a participant.", parse_mode=None)
             return
 
         await db.upsert_participant(
             group_id, target.id, target.username, target.full_name
         )
         mention = format_mention(target.id, target.username, target.full_name)
-        await msg.reply(f"✅ {mention} added to the challenge.", parse_mode="HTML")
+        await msg.reply(f"✅ {mention} added to the challenge.")
         return
 
     # Case B: /add @username
@@ -221,25 +254,18 @@ async def cmd_add(
             "Usage:\n"
             "• Reply to someone's message: <code>/add</code>\n"
             "• By username: <code>/add @username</code>",
-            parse_mode="HTML",
         )
         return
 
     username = raw
-    existing = await db.get_participant_by_username(group_id, username)
-    if existing and existing["user_id"]:
-        # We already have their user_id — activate directly
-        await db.upsert_participant(
-            group_id, existing["user_id"], username, existing["display_name"]
-        )
-        await msg.reply(f"✅ @{username} added to the challenge.")
+    if await db.add_participant_by_username(group_id, username):
+        # We already had their user_id — activated directly
+        await msg.reply(f"✅ @{username} added to the challenge.", parse_mode=None)
     else:
-        await db.add_pending_participant(group_id, username)
         await msg.reply(
             f"⏳ <b>@{username}</b> queued.\n"
             f"They'll be fully registered when they send any message in this group, "
             f"or they can use /join themselves.",
-            parse_mode="HTML",
         )
 
 
@@ -247,7 +273,7 @@ async def cmd_add(
 # /remove  (reply or @username)
 # ---------------------------------------------------------------------------
 
-@router.message(Command("remove"), IsGroup(), IsAdmin())
+@router.message(Command("remove"), IsAdmin())
 async def cmd_remove(
     msg: Message,
     db: Database,
@@ -261,9 +287,9 @@ async def cmd_remove(
         removed = await db.deactivate_participant_by_user_id(group_id, target.id)
         name = format_mention(target.id, target.username, target.full_name)
         if removed:
-            await msg.reply(f"✅ {name} removed from the challenge.", parse_mode="HTML")
+            await msg.reply(f"✅ {name} removed from the challenge.")
         else:
-            await msg.reply(f"❌ {name} is not an active participant.", parse_mode="HTML")
+            await msg.reply(f"❌ {name} is not an active participant.")
         return
 
     # Case B: @username
@@ -273,22 +299,21 @@ async def cmd_remove(
             "Usage:\n"
             "• Reply to someone's message: <code>/remove</code>\n"
             "• By username: <code>/remove @username</code>",
-            parse_mode="HTML",
         )
         return
 
     removed = await db.deactivate_participant_by_username(group_id, raw)
     if removed:
-        await msg.reply(f"✅ @{raw} removed from the challenge.")
+        await msg.reply(f"✅ @{raw} removed from the challenge.", parse_mode=None)
     else:
-        await msg.reply(f"❌ @{raw} is not an active participant.")
+        await msg.reply(f"❌ @{raw} is not an active participant.", parse_mode=None)
 
 
 # ---------------------------------------------------------------------------
 # /participants
 # ---------------------------------------------------------------------------
 
-@router.message(Command("participants"), IsGroup(), IsAdmin())
+@router.message(Command("participants"), IsAdmin())
 async def cmd_participants(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
     rows = await db.get_active_participants(group_id)
@@ -296,32 +321,29 @@ async def cmd_participants(msg: Message, db: Database) -> None:
     if not rows:
         await msg.reply(
             "No active participants yet.\n"
-            "Add them with /add or they can use /join."
+            "Add them with /add or they can use /join.",
+            parse_mode=None,
         )
         return
 
-    lines = [f"👥 <b>Active Participants ({len(rows)})</b>\n"]
-    has_pending = False
-    for i, p in enumerate(rows, 1):
-        mention = format_mention(p["user_id"], p["username"], p["display_name"])
-        pending_tag = " ⏳" if p["pending"] else ""
-        has_pending = has_pending or bool(p["pending"])
-        lines.append(f"{i}. {mention}{pending_tag}")
-
-    if has_pending:
-        lines.append(
-            "\n<i>⏳ = pending (user_id not yet resolved; "
-            "they need to send a message or use /join)</i>"
-        )
+    pending = [p["pending"] for p in rows]
+    body = "\n".join(
+        f"{i}. {mention}{' ⏳' if is_pending else ''}"
+        for i, (mention, is_pending) in enumerate(zip(format_mentions(rows), pending), 1)
+    )
+    text = f"👥 <b>Active Participants ({len(rows)})</b>\n\n{body}"
+
+    if any(pending):
+        text += _PENDING_NOTE
 
-    await msg.reply("\n".join(lines), parse_mode="HTML")
+    await reply_chunked(msg, text)
 
 
 # ---------------------------------------------------------------------------
 # /addall  (@username1 @username2 ...)
 # ---------------------------------------------------------------------------
 
-@router.message(Command("addall"), IsGroup(), IsAdmin())
+@router.message(Command("addall"), IsAdmin())
 async def cmd_addall(
     msg: Message,
     db: Database,
@@ -333,27 +355,22 @@ async def cmd_addall(
     if not raw:
         await msg.reply(
             "Қолданылуы: <code>/addall @username1 @username2 ...</code>",
-            parse_mode="HTML",
         )
         return
 
     usernames = [u.lstrip("@") for u in raw.split() if u.strip()]
     if not usernames:
-        await msg.reply("❌ Username табылмады.")
+        await msg.reply("❌ Username табылмады.", parse_mode=None)
         return
 
     added_lines = []
     pending_lines = []
 
-    for username in usernames:
-        existing = await db.get_participant_by_username(group_id, username)
-        if existing and existing["user_id"]:
-            await db.upsert_participant(
-                group_id, existing["user_id"], username, existing["display_name"]
-            )
+    known = await db.add_participants_by_usernames(group_id, usernames)
+    for username, is_known in zip(usernames, known):
+        if is_known:
             added_lines.append(f"✅ @{username}")
         else:
-            await db.add_pending_participant(group_id, username)
             pending_lines.append(f"⏳ @{username}")
 
     lines = [f"👥 <b>{len(usernames)} мүше өңделді:</b>\n"]
@@ -362,21 +379,29 @@ async def cmd_addall(
     if pending_lines:
         lines.append("Күтілуде: " + ", ".join(pending_lines))
     if pending_lines:
-        lines.append(
-            "\n<i>⏳ — user_id әлі белгісіз. "
-            "Топта хабар жіберсе немесе /join пайдаланса тіркеледі.</i>"
-        )
+        lines.append(_ADDALL_PENDING_NOTE)
 
-    await msg.reply("\n".join(lines), parse_mode="HTML")
+    await msg.reply("\n".join(lines))
 
 
 # ---------------------------------------------------------------------------
 # /weekly_summary_now
 # ---------------------------------------------------------------------------
 
-@router.message(Command("weekly_summary_now"), IsGroup(), IsAdmin())
+@router.message(Command("weekly_summary_now"), IsAdmin())
 async def cmd_weekly_summary_now(msg: Message, db: Database, bot: Bot) -> None:
-    await msg.reply("📊 Generating current-week preview…")
+    week_start, week_end = preview_week_bounds()
+    # Run the preview's leaderboard query (the range post_weekly_summary
+    # uses) while the ack is in flight; the post then reads it from the
+    # leaderboard cache.  The post itself still waits for the ack so the
+    # two messages arrive in order.  msg.reply() builds a SendMessage, which
+    # gather() can't take; emit() turns it into a coroutine.
+    await asyncio.gather(
+        msg.reply("📊 Generating current-week preview…", parse_mode=None).emit(bot),
+        db.get_weekly_leaderboard(
+            msg.chat.id, week_start.isoformat(), week_end.isoformat()
+        ),
+    )
     await post_weekly_summary(msg.chat.id, bot, db, preview=True)
 
 
@@ -384,32 +409,24 @@ async def cmd_weekly_summary_now(msg: Message, db: Database, bot: Bot) -> None:
 # /monthly_summary_now
 # ---------------------------------------------------------------------------
 
-@router.message(Command("monthly_summary_now"), IsGroup(), IsAdmin())
+@router.message(Command("monthly_summary_now"), IsAdmin())
 async def cmd_monthly_summary_now(msg: Message, db: Database, bot: Bot) -> None:
     group_id = msg.chat.id
-    month_start, month_end = get_current_month_bounds()
     today = get_almaty_today()
+    month_start, month_end = get_current_month_bounds(today)
     days_so_far = (today - month_start).days + 1
 
     rows = await db.get_monthly_leaderboard(
         group_id, month_start.isoformat(), month_end.isoformat()
     )
     if not rows:
-        await msg.reply("No participants yet.")
+        await msg.reply("No participants yet.", parse_mode=None)
         return
 
-    medals = ["🥇", "🥈", "🥉"]
-    lines = [
+    await reply_chunked(
+        msg,
         f"📅 <b>{month_start.strftime('%B %Y')} — Reading Challenge</b>\n"
-        f"Day {days_so_far} of {(month_end - month_start).days + 1}\n"
-    ]
-    for i, p in enumerate(rows):
-        medal = medals[i] if i < 3 else f"{i + 1}."
-        mention = format_mention(p["user_id"], p["username"], p["display_name"])
-        yes = p["yes_count"]
-        rate = f"{yes / days_so_far * 100:.0f}%" if days_so_far > 0 else "0%"
-        fire = " 🔥" if yes == days_so_far else ""
-        warn = " ⚠️" if p["missed_count"] >= 4 else ""
-        lines.append(f"{medal} {mention} — {yes}/{days_so_far} ({rate}){fire}{warn}")
-
-    await bot.send_message(group_id, "\n".join(lines), parse_mode="HTML")
+        f"Day {days_so_far} of {(month_end - month_start).days + 1}\n\n"
+        f"{format_standings(rows, days_so_far, warn_missed=True)}",
+        reply=False,
+    )
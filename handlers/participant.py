@@ -9,6 +9,7 @@ Commands (group-only, no admin required):
   /leaderboard — current-week standings
 """
 
+import asyncio
 import logging
 
 from aiogram import Router
@@ -16,33 +17,66 @@ from aiogram.filters import Command
 from aiogram.types import Message
 
 from db import Database
-from middleware import IsGroup
+from middleware import IsGroup, LooksLikeCommand
 from utils import (
     format_mention,
+    format_standings,
     get_almaty_today,
     get_current_month_bounds,
     get_current_week_bounds,
     make_poll_link,
+    reply_chunked,
 )
 
 from config import DEFAULT_POLL_TIME
 
 logger = logging.getLogger(__name__)
 router = Router()
+# Checked once per message for the whole router: only group commands get
+# as far as the per-handler Command() filters.
+router.message.filter(IsGroup(), LooksLikeCommand())
+
+# Static part of /help; only the status header is formatted per call.
+_HELP_COMMANDS = (
+    "<b>Командалар:</b>\n"
+    "/join — челленджге қосылу\n"
+    "/leave — челленджден шығу\n"
+    "/today — бүгінгі дауыс беру статусы\n"
+    "/stats — апталық және жалпы статистика\n"
+    "/leaderboard — ағымдағы апта кестесі\n"
+    "/monthly — айлық кесте\n"
+    "/help — осы мәзір\n\n"
+    "<b>Админ командалары:</b>\n"
+    "/challenge_start — челленджді бастау\n"
+    "/challenge_stop — челленджді тоқтату\n"
+    "/set_time HH:MM — сауалнама уақытын өзгерту\n"
+    "/set_reminder_time HH:MM — еске салу уақытын өзгерту\n"
+    "/add — мүше қосу (жауап немесе @username)\n"
+    "/addall @n1 @n2 ... — бірнеше мүшені бірден қосу\n"
+    "/remove — мүшені жою\n"
+    "/participants — мүшелер тізімі\n"
+    "/weekly_summary_now — апталық қорытынды"
+)
+
+_NOT_PARTICIPANT = "❌ You're not a participant. Use /join to join the challenge."
+_NO_PARTICIPANTS = (
+    "No participants yet.\n"
+    "Add participants with /add or use /join to self-enroll."
+)
 
 
 # ---------------------------------------------------------------------------
 # /join
 # ---------------------------------------------------------------------------
 
-@router.message(Command("join"), IsGroup())
+@router.message(Command("join"))
 async def cmd_join(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
     user = msg.from_user
 
     existing = await db.get_participant_by_user_id(group_id, user.id)
     if existing and existing["active"]:
-        await msg.reply("✅ You're already a participant in this challenge!")
+        await msg.reply("✅ You're already a participant in this challenge!", parse_mode=None)
         return
 
     await db.upsert_participant(group_id, user.id, user.username, user.full_name)
@@ -50,7 +84,6 @@ async def cmd_join(msg: Message, db: Database) -> None:
         "✅ <b>You've joined the reading challenge!</b>\n\n"
         "You'll be tracked in the daily 20:00 poll.\n"
         "Read 30 minutes every day and vote ✅ Yes! 📚",
-        parse_mode="HTML",
     )
 
 
@@ -58,71 +91,76 @@ async def cmd_join(msg: Message, db: Database) -> None:
 # /leave
 # ---------------------------------------------------------------------------
 
-@router.message(Command("leave"), IsGroup())
+@router.message(Command("leave"))
 async def cmd_leave(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
     removed = await db.deactivate_participant_by_user_id(group_id, msg.from_user.id)
     if removed:
         await msg.reply(
             "👋 You've left the reading challenge.\n"
-            "Your reading history is preserved. You can /join again any time."
+            "Your reading history is preserved. You can /join again any time.",
+            parse_mode=None,
         )
     else:
-        await msg.reply("❌ You're not an active participant.")
+        await msg.reply("❌ You're not an active participant.", parse_mode=None)
 
 
 # ---------------------------------------------------------------------------
 # /today
 # ---------------------------------------------------------------------------
 
-@router.message(Command("today"), IsGroup())
+@router.message(Command("today"))
 async def cmd_today(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
     user_id = msg.from_user.id
-    today = get_almaty_today().isoformat()
+    today_date = get_almaty_today()
+    today = today_date.isoformat()
 
-    participant = await db.get_participant_by_user_id(group_id, user_id)
+    participant, poll = await asyncio.gather(
+        db.get_participant_by_user_id(group_id, user_id),
+        db.get_poll_by_date(group_id, today),
+    )
     if not participant or not participant["active"]:
-        await msg.reply("❌ You're not a participant. Use /join to join the challenge.")
+        await msg.reply(_NOT_PARTICIPANT, parse_mode=None)
+        return
+
+    # Common before the poll goes out: nothing to report for today yet.
+    if not poll or not poll["tg_poll_id"]:
+        await msg.reply("⏰ No poll posted yet today — check /stats for your history.", parse_mode=None)
         return
 
-    poll = await db.get_poll_by_date(group_id, today)
+    week_start, week_end = get_current_week_bounds(today_date)
+    vote_row, weekly = await asyncio.gather(
+        db.get_today_vote_for_user(group_id, user_id, today),
+        db.get_participant_stats_weekly(
+            participant["id"], week_start.isoformat(), week_end.isoformat()
+        ),
+    )
 
     # Determine vote status
-    if not poll or not poll["tg_poll_id"]:
-        vote_line = "⏰ No poll posted yet today."
-        link_line = ""
+    if vote_row is None or vote_row["option_idx"] is None:
+        vote_line = "🗳 You haven't voted yet — check the poll below!"
+    elif vote_row["option_idx"] == 0:
+        ts = (vote_row["voted_at"] or "")[:16].replace("T", " ")
+        vote_line = f"✅ <b>Yes</b> (voted at {ts} Almaty)"
     else:
-        vote_row = await db.get_today_vote_for_user(group_id, user_id, today)
-        if vote_row is None or vote_row["option_idx"] is None:
-            vote_line = "🗳 You haven't voted yet — check the poll below!"
-        elif vote_row["option_idx"] == 0:
-            ts = (vote_row["voted_at"] or "")[:16].replace("T", " ")
-            vote_line = f"✅ <b>Yes</b> (voted at {ts} Almaty)"
-        else:
-            ts = (vote_row["voted_at"] or "")[:16].replace("T", " ")
-            vote_line = f"❌ <b>No</b> (voted at {ts} Almaty)"
-
-        if poll["message_id"]:
-            link = make_poll_link(group_id, poll["message_id"])
-            link_line = f'\n🔗 <a href="{link}">Go to today\'s poll</a>' if link else ""
-        else:
-            link_line = ""
+        ts = (vote_row["voted_at"] or "")[:16].replace("T", " ")
+        vote_line = f"❌ <b>No</b> (voted at {ts} Almaty)"
+
+    link_line = ""
+    if poll["message_id"]:
+        link = make_poll_link(group_id, poll["message_id"])
+        if link:
+            link_line = f'\n🔗 <a href="{link}">Go to today\'s poll</a>'
 
     # Weekly stats so far
-    week_start, week_end = get_current_week_bounds()
-    weekly = await db.get_participant_stats_weekly(
-        participant["id"], week_start.isoformat(), week_end.isoformat()
-    )
-    days_so_far = (get_almaty_today() - week_start).days + 1
+    days_so_far = (today_date - week_start).days + 1
     yes_count = weekly["total_yes"] if weekly else 0
 
     await msg.reply(
         f"📅 <b>Today ({today})</b>\n"
         f"• {vote_line}{link_line}\n\n"
         f"📈 This week: {yes_count}/{days_so_far} days ✅",
-        parse_mode="HTML",
-        disable_web_page_preview=True,
     )
 
 
@@ -130,34 +168,33 @@ async def cmd_today(msg: Message, db: Database) -> None:
 # /stats
 # ---------------------------------------------------------------------------
 
-@router.message(Command("stats"), IsGroup())
+@router.message(Command("stats"))
 async def cmd_stats(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
     user_id = msg.from_user.id
 
     participant = await db.get_participant_by_user_id(group_id, user_id)
     if not participant or not participant["active"]:
-        await msg.reply("❌ You're not a participant. Use /join to join the challenge.")
+        await msg.reply(_NOT_PARTICIPANT, parse_mode=None)
         return
 
     pid = participant["id"]
     week_start, week_end = get_current_week_bounds()
-    weekly = await db.get_participant_stats_weekly(
-        pid, week_start.isoformat(), week_end.isoformat()
+    stats = await db.get_participant_stats_combined(
+        group_id, pid, week_start.isoformat(), week_end.isoformat()
     )
-    alltime = await db.get_participant_stats_alltime(pid)
 
     def _rate(yes: int, total: int) -> str:
         return f"{yes / total * 100:.0f}%" if total > 0 else "—"
 
-    w_yes = weekly["total_yes"] if weekly else 0
-    w_no = weekly["total_no"] if weekly else 0
-    w_missed = weekly["total_missed"] if weekly else 0
+    w_yes = stats["week_yes"] if stats else 0
+    w_no = stats["week_no"] if stats else 0
+    w_missed = stats["week_missed"] if stats else 0
     w_total = w_yes + w_no + w_missed
 
-    a_yes = alltime["total_yes"] if alltime else 0
-    a_no = alltime["total_no"] if alltime else 0
-    a_missed = alltime["total_missed"] if alltime else 0
+    a_yes = stats["total_yes"] if stats else 0
+    a_no = stats["total_no"] if stats else 0
+    a_missed = stats["total_missed"] if stats else 0
     a_total = a_yes + a_no + a_missed
 
     name = format_mention(user_id, msg.from_user.username, msg.from_user.full_name)
@@ -174,7 +211,6 @@ async def cmd_stats(msg: Message, db: Database) -> None:
         f"  ❌ No:     {a_no} days\n"
         f"  😶 Missed: {a_missed} days\n"
         f"  📈 Rate:   {_rate(a_yes, a_total)}",
-        parse_mode="HTML",
     )
 
 
@@ -182,45 +218,34 @@ async def cmd_stats(msg: Message, db: Database) -> None:
 # /leaderboard
 # ---------------------------------------------------------------------------
 
-@router.message(Command("leaderboard"), IsGroup())
+@router.message(Command("leaderboard"))
 async def cmd_leaderboard(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
-    week_start, week_end = get_current_week_bounds()
+    today = get_almaty_today()
+    week_start, week_end = get_current_week_bounds(today)
     rows = await db.get_weekly_leaderboard(
         group_id, week_start.isoformat(), week_end.isoformat()
     )
 
     if not rows:
-        await msg.reply(
-            "No participants yet.\n"
-            "Add participants with /add or use /join to self-enroll."
-        )
+        await msg.reply(_NO_PARTICIPANTS, parse_mode=None)
         return
 
-    days_so_far = (get_almaty_today() - week_start).days + 1
-    medals = ["🥇", "🥈", "🥉"]
+    days_so_far = (today - week_start).days + 1
 
-    lines = [
+    await reply_chunked(
+        msg,
         f"🏆 <b>Leaderboard</b>\n"
-        f"Week of {week_start.strftime('%b %d')} · {days_so_far}/7 days elapsed\n"
-    ]
-
-    for i, p in enumerate(rows):
-        medal = medals[i] if i < 3 else f"{i + 1}."
-        mention = format_mention(p["user_id"], p["username"], p["display_name"])
-        yes = p["yes_count"]
-        rate = f"{yes / days_so_far * 100:.0f}%" if days_so_far > 0 else "0%"
-        fire = " 🔥" if yes == days_so_far else ""
-        lines.append(f"{medal} {mention} — {yes}/{days_so_far} ({rate}){fire}")
-
-    await msg.reply("\n".join(lines), parse_mode="HTML")
+        f"Week of {week_start.strftime('%b %d')} · {days_so_far}/7 days elapsed\n\n"
+        f"{format_standings(rows, days_so_far)}",
+    )
 
 
 # ---------------------------------------------------------------------------
 # /help
 # ---------------------------------------------------------------------------
 
-@router.message(Command("help"), IsGroup())
+@router.message(Command("help"))
 async def cmd_help(msg: Message, db: Database) -> None:
     settings = await db.get_settings(msg.chat.id)
     poll_time = settings["poll_time"] if settings else DEFAULT_POLL_TIME
@@ -233,25 +258,7 @@ async def cmd_help(msg: Message, db: Database) -> None:
         f"📊 Статус: {status}\n"
         f"⏰ Сауалнама: <b>{poll_time}</b>\n"
         f"⚠️ Еске салу: <b>{reminder_time}</b>\n\n"
-        f"<b>Командалар:</b>\n"
-        f"/join — челленджге қосылу\n"
-        f"/leave — челленджден шығу\n"
-        f"/today — бүгінгі дауыс беру статусы\n"
-        f"/stats — апталық және жалпы статистика\n"
-        f"/leaderboard — ағымдағы апта кестесі\n"
-        f"/monthly — айлық кесте\n"
-        f"/help — осы мәзір\n\n"
-        f"<b>Админ командалары:</b>\n"
-        f"/challenge_start — челленджді бастау\n"
-        f"/challenge_stop — челленджді тоқтату\n"
-        f"/set_time HH:MM — сауалнама уақытын өзгерту\n"
-        f"/set_reminder_time HH:MM — еске салу уақытын өзгерту\n"
-        f"/add — мүше қосу (жауап немесе @username)\n"
-        f"/addall @n1 @n2 ... — бірнеше мүшені бірден қосу\n"
-        f"/remove — мүшені жою\n"
-        f"/participants — мүшелер тізімі\n"
-        f"/weekly_summary_now — апталық қорытынды",
-        parse_mode="HTML",
+        + _HELP_COMMANDS,
     )
 
 
@@ -259,35 +266,23 @@ async def cmd_help(msg: Message, db: Database) -> None:
 # /monthly
 # ---------------------------------------------------------------------------
 
-@router.message(Command("monthly"), IsGroup())
+@router.message(Command("monthly"))
 async def cmd_monthly(msg: Message, db: Database) -> None:
     group_id = msg.chat.id
-    month_start, month_end = get_current_month_bounds()
     today = get_almaty_today()
+    month_start, month_end = get_current_month_bounds(today)
     days_so_far = (today - month_start).days + 1
 
     rows = await db.get_monthly_leaderboard(
         group_id, month_start.isoformat(), month_end.isoformat()
     )
     if not rows:
-        await msg.reply(
-            "No participants yet.\n"
-            "Add participants with /add or use /join to self-enroll."
-        )
+        await msg.reply(_NO_PARTICIPANTS, parse_mode=None)
         return
 
-    medals = ["🥇", "🥈", "🥉"]
-    lines = [
+    await reply_chunked(
+        msg,
         f"📅 <b>{month_start.strftime('%B %Y')}</b> — Reading Challenge\n"
-        f"Day {days_so_far} of {(month_end - month_start).days + 1}\n"
-    ]
-    for i, p in enumerate(rows):
-        medal = medals[i] if i < 3 else f"{i + 1}."
-        mention = format_mention(p["user_id"], p["username"], p["display_name"])
-        yes = p["yes_count"]
-        rate = f"{yes / days_so_far * 100:.0f}%" if days_so_far > 0 else "0%"
-        fire = " 🔥" if yes == days_so_far else ""
-        warn = " ⚠️" if p["missed_count"] >= 4 else ""
-        lines.append(f"{medal} {mention} — {yes}/{days_so_far} ({rate}){fire}{warn}")
-
-    await msg.reply("\n".join(lines), parse_mode="HTML")
+        f"Day {days_so_far} of {(month_end - month_start).days + 1}\n\n"
+        f"{format_standings(rows, days_so_far, warn_missed=True)}",
+    )
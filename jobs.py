@@ -5,15 +5,17 @@ Scheduler jobs:
   post_weekly_summary    — posts the weekly leaderboard every Monday at 09:00
                            and snapshots weekly_results (idempotent)
 
-schedule_group_jobs / remove_group_jobs manage APScheduler entries per group.
+schedule_group_jobs / remove_group_jobs manage the per-group poll and reminder
+jobs; schedule_global_jobs adds one snapshot and one weekly-summary job that
+run for every active group at once, since those times are the same for all.
 """
 
 import asyncio
 import logging
 from datetime import date
-from typing import Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
-import pytz
 from aiogram import Bot
 from aiogram.exceptions import TelegramAPIError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -22,8 +24,10 @@ from apscheduler.triggers.cron import CronTrigger
 from config import TIMEZONE
 from db import Database
 from utils import (
-    format_mention,
+    format_mentions,
+    format_standings,
     get_almaty_today,
+    get_current_month_bounds,
     get_current_week_bounds,
     get_prev_week_bounds,
     make_poll_link,
@@ -31,13 +35,26 @@ from utils import (
 
 
 logger = logging.getLogger(__name__)
-TZ = pytz.timezone(TIMEZONE)
+TZ = ZoneInfo(TIMEZONE)
+
+# group_id -> (roster rows, joined mentions).  Database.get_active_participants
+# returns the same list object until the roster changes, so an identity check
+# tells whether the cached line is still current.
+_mentions_cache: Dict[int, Tuple[List, str]] = {}
 
 
 # ---------------------------------------------------------------------------
 # Job: daily poll
 # ---------------------------------------------------------------------------
 
+async def _pin_quietly(bot: Bot, group_id: int, message_id: int) -> None:
+    """Pin without notification; non-critical — the bot may lack permission."""
+    try:
+        await bot.pin_chat_message(group_id, message_id, disable_notification=True)
+    except TelegramAPIError:
+        pass
+
+
 async def post_daily_poll(group_id: int, bot: Bot, db: Database) -> None:
     today = get_almaty_today().isoformat()
 
@@ -50,11 +67,12 @@ async def post_daily_poll(group_id: int, bot: Bot, db: Database) -> None:
     participants = await db.get_active_participants(group_id)
 
     # Build mention string (all mentions in one message — anti-spam)
-    mention_parts = [
-        format_mention(p["user_id"], p["username"], p["display_name"])
-        for p in participants
-    ]
-    mentions_line = " ".join(mention_parts) if mention_parts else "everyone"
+    cached = _mentions_cache.get(group_id)
+    if cached and cached[0] is participants:
+        mentions_line = cached[1]
+    else:
+        mentions_line = " ".join(format_mentions(participants)) or "everyone"
+        _mentions_cache[group_id] = (participants, mentions_line)
 
     try:
         await bot.send_message(
@@ -64,11 +82,10 @@ async def post_daily_poll(group_id: int, bot: Bot, db: Database) -> None:
                 f"{mentions_line}\n\n"
                 f"Vote in the poll below 👇"
             ),
-            parse_mode="HTML",
         )
 
-        await asyncio.sleep(0.5)  # small buffer before poll
-
+        # The mention message's send has already returned, so the poll
+        # lands after it without an extra sleep.
         poll_msg = await bot.send_poll(
             chat_id=group_id,
             question="Did you read 30 minutes today?",
@@ -77,21 +94,17 @@ async def post_daily_poll(group_id: int, bot: Bot, db: Database) -> None:
             allows_multiple_answers=False,
         )
 
-        # Persist Telegram IDs so we can correlate poll_answer updates
-        await db.update_poll_telegram_ids(
-            group_id, today,
-            poll_msg.poll.id,
-            poll_msg.message_id,
+        # Persist Telegram IDs so we can correlate poll_answer updates;
+        # the pin round-trip to Telegram overlaps the local write.
+        await asyncio.gather(
+            db.update_poll_telegram_ids(
+                group_id, today,
+                poll_msg.poll.id,
+                poll_msg.message_id,
+            ),
+            _pin_quietly(bot, group_id, poll_msg.message_id),
         )
 
-        # Attempt to pin the poll (non-critical — bot may lack permission)
-        try:
-            await bot.pin_chat_message(
-                group_id, poll_msg.message_id, disable_notification=True
-            )
-        except TelegramAPIError:
-            pass
-
         logger.info("Daily poll posted for group=%s date=%s", group_id, today)
 
     except TelegramAPIError as exc:
@@ -107,31 +120,25 @@ async def post_daily_poll(group_id: int, bot: Bot, db: Database) -> None:
 # ---------------------------------------------------------------------------
 
 async def snapshot_daily_results(group_id: int, bot: Bot, db: Database) -> None:
-    today = get_almaty_today().isoformat()
+    today_date = get_almaty_today()
+    today = today_date.isoformat()
     poll = await db.get_poll_by_date(group_id, today)
-    participants = await db.get_active_participants(group_id)
-
-    for p in participants:
-        pid = p["id"]
-        uid = p["user_id"]
-
-        if not uid or not poll or not poll["tg_poll_id"]:
-            # Pending participant or no poll today
-            status = "missed"
-        else:
-            vote = await db.get_vote(poll["id"], uid)
-            if vote is None or vote["option_idx"] is None:
-                status = "missed"
-            elif vote["option_idx"] == 0:
-                status = "yes"
-            else:
-                status = "no"
-
-        await db.upsert_daily_result(group_id, pid, today, status)
+    # No poll today (or it never reached Telegram): everyone is missed.
+    poll_id = poll["id"] if poll and poll["tg_poll_id"] else None
+    count = await db.materialize_daily_results(group_id, today, poll_id)
 
     logger.info(
         "Snapshotted daily results for group=%s date=%s (%d participants)",
-        group_id, today, len(participants),
+        group_id, today, count,
+    )
+
+    # The snapshot just dropped this group's cached leaderboards; rebuild the
+    # current week and month now so the first /leaderboard of the day is warm.
+    week_start, week_end = get_current_week_bounds(today_date)
+    month_start, month_end = get_current_month_bounds(today_date)
+    await asyncio.gather(
+        db.get_weekly_leaderboard(group_id, week_start.isoformat(), week_end.isoformat()),
+        db.get_monthly_leaderboard(group_id, month_start.isoformat(), month_end.isoformat()),
     )
 
 
@@ -152,11 +159,7 @@ async def send_poll_reminder(group_id: int, bot: Bot, db: Database) -> None:
         logger.info("All voted for group=%s — no reminder needed", group_id)
         return
 
-    mention_parts = [
-        format_mention(p["user_id"], p["username"], p["display_name"])
-        for p in unvoted
-    ]
-    mentions_line = " ".join(mention_parts)
+    mentions_line = " ".join(format_mentions(unvoted))
 
     link_line = ""
     if poll["message_id"]:
@@ -172,8 +175,6 @@ async def send_poll_reminder(group_id: int, bot: Bot, db: Database) -> None:
                 f"{mentions_line}\n\n"
                 f"You haven't voted in today's reading poll yet! 📚{link_line}"
             ),
-            parse_mode="HTML",
-            disable_web_page_preview=True,
         )
         logger.info(
             "Poll reminder sent for group=%s date=%s (%d unvoted)",
@@ -187,6 +188,13 @@ async def send_poll_reminder(group_id: int, bot: Bot, db: Database) -> None:
 # Job: weekly summary (Monday 09:00)
 # ---------------------------------------------------------------------------
 
+def preview_week_bounds(today: Optional[date] = None) -> Tuple[date, date]:
+    """(Monday, today): the part of the current week a preview summary covers."""
+    today = today or get_almaty_today()
+    week_start, week_end = get_current_week_bounds(today)
+    return week_start, min(week_end, today)
+
+
 async def post_weekly_summary(
     group_id: int,
     bot: Bot,
@@ -206,8 +214,7 @@ async def post_weekly_summary(
         Does NOT snapshot or reset; safe to run any time.
     """
     if preview:
-        week_start, week_end = get_current_week_bounds()
-        week_end = min(week_end, get_almaty_today())   # cap at today
+        week_start, week_end = preview_week_bounds()
         heading = "📊 <b>Current-week preview</b>"
     else:
         week_start, week_end = get_prev_week_bounds()
@@ -229,39 +236,22 @@ async def post_weekly_summary(
         return
 
     total_days = (week_end - week_start).days + 1
-    medals = ["🥇", "🥈", "🥉"]
-
-    lines = [
-        f"{heading} — Reading Challenge\n"
-    ]
-
-    for i, p in enumerate(rows):
-        yes = p["yes_count"]
-        rate = yes / total_days * 100
-        medal = medals[i] if i < 3 else "•"
-        mention = format_mention(p["user_id"], p["username"], p["display_name"])
-        fire = " 🔥" if yes == total_days else ""
-        warn = " ⚠️" if p["missed_count"] >= 4 else ""
-        lines.append(f"{medal} {mention} — {yes}/{total_days} ({rate:.0f}%){fire}{warn}")
-
-        # Snapshot for scheduled run only
-        if not preview:
-            await db.insert_weekly_result(
-                group_id, p["id"], week_start_str,
-                yes, p["no_count"], p["missed_count"],
-                round(rate, 2), i + 1,
-            )
 
+    # Snapshot for scheduled run only
     if not preview:
-        lines.append("\n📅 New week starts today. Keep reading! 📚")
-        lines.append("<i>Weekly stats reset. All-time stats preserved.</i>")
+        await db.materialize_weekly_results(group_id, week_start_str, week_end_str)
+        footer = (
+            "📅 New week starts today. Keep reading! 📚\n"
+            "<i>Weekly stats reset. All-time stats preserved.</i>"
+        )
     else:
-        lines.append(f"\n<i>Preview — week runs {week_start.strftime('%b %d')}–{week_end.strftime('%b %d')}</i>")
+        footer = f"<i>Preview — week runs {week_start.strftime('%b %d')}–{week_end.strftime('%b %d')}</i>"
 
     await bot.send_message(
         group_id,
-        "\n".join(lines),
-        parse_mode="HTML",
+        f"{heading} — Reading Challenge\n\n"
+        f"{format_standings(rows, total_days, warn_missed=True, bullet='•')}\n\n"
+        f"{footer}",
     )
     logger.info(
         "Weekly summary posted for group=%s week=%s preview=%s",
@@ -269,10 +259,52 @@ async def post_weekly_summary(
     )
 
 
+# ---------------------------------------------------------------------------
+# Fan-out over all active groups
+# ---------------------------------------------------------------------------
+
+async def _for_active_groups(
+    job: Callable[[int, Bot, Database], Awaitable[None]],
+    bot: Bot,
+    db: Database,
+) -> None:
+    """Run a per-group job concurrently for every group with an active challenge."""
+    groups = [row["group_id"] for row in await db.get_all_active_challenges()]
+    results = await asyncio.gather(
+        *(job(group_id, bot, db) for group_id in groups), return_exceptions=True
+    )
+    # One group's failure must not hide another's; log each like APScheduler would.
+    for group_id, result in zip(groups, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "%s failed for group=%s", job.__name__, group_id, exc_info=result
+            )
+
+
 # ---------------------------------------------------------------------------
 # Scheduler management helpers
 # ---------------------------------------------------------------------------
 
+def schedule_global_jobs(scheduler: AsyncIOScheduler, bot: Bot, db: Database) -> None:
+    """Add the 23:59 snapshot and Monday 09:00 summary, each one job for all groups."""
+    scheduler.add_job(
+        _for_active_groups,
+        CronTrigger(hour=23, minute=59, timezone=TZ),
+        id="snapshot_all",
+        args=[snapshot_daily_results, bot, db],
+        replace_existing=True,
+        misfire_grace_time=120,
+    )
+    scheduler.add_job(
+        _for_active_groups,
+        CronTrigger(day_of_week="mon", hour=9, minute=0, timezone=TZ),
+        id="weekly_all",
+        args=[post_weekly_summary, bot, db],
+        replace_existing=True,
+        misfire_grace_time=300,
+    )
+
+
 def schedule_group_jobs(
     scheduler: AsyncIOScheduler,
     group_id: int,
@@ -281,7 +313,7 @@ def schedule_group_jobs(
     db: Database,
     reminder_time: Optional[str] = None,
 ) -> None:
-    """Add (or replace) the cron jobs for a group."""
+    """Add (or replace) the poll and reminder cron jobs for a group."""
     hour, minute = map(int, poll_time.split(":"))
 
     scheduler.add_job(
@@ -292,23 +324,6 @@ def schedule_group_jobs(
         replace_existing=True,
         misfire_grace_time=300,      # fire even if bot was down ≤5 min
     )
-    scheduler.add_job(
-        snapshot_daily_results,
-        CronTrigger(hour=23, minute=59, timezone=TZ),
-        id=f"snapshot_{group_id}",
-        args=[group_id, bot, db],
-        replace_existing=True,
-        misfire_grace_time=120,
-    )
-    scheduler.add_job(
-        post_weekly_summary,
-        CronTrigger(day_of_week="mon", hour=9, minute=0, timezone=TZ),
-        id=f"weekly_{group_id}",
-        args=[group_id, bot, db],
-        replace_existing=True,
-        misfire_grace_time=300,
-    )
-
     # Remove stale reminder job before (re)adding
     if scheduler.get_job(f"reminder_{group_id}"):
         scheduler.remove_job(f"reminder_{group_id}")
@@ -335,9 +350,13 @@ def schedule_group_jobs(
 
 
 def remove_group_jobs(scheduler: AsyncIOScheduler, group_id: int) -> None:
-    """Remove all scheduler jobs for a group (on /challenge_stop)."""
-    for prefix in ("poll", "snapshot", "weekly", "reminder"):
+    """
+    Remove a group's scheduler jobs (on /challenge_stop).  The shared snapshot
+    and weekly jobs skip it on their own once the challenge is inactive.
+    """
+    for prefix in ("poll", "reminder"):
         job_id = f"{prefix}_{group_id}"
         if scheduler.get_job(job_id):
             scheduler.remove_job(job_id)
+    _mentions_cache.pop(group_id, None)
     logger.info("Removed scheduler jobs for group=%s", group_id)
@@ -5,7 +5,8 @@ Start-up sequence:
   1. Connect to SQLite database (creates schema on first run).
   2. Register middleware (group registration + pending-username resolver).
   3. Register routers (admin, participant, poll-answer, misc).
-  4. Restore APScheduler jobs for every group that has an active challenge.
+  4. Restore APScheduler jobs for every group that has an active challenge,
+     plus the shared 23:59 snapshot and Monday summary jobs.
   5. Start aiogram long-polling (swap for webhook in production).
 
 IMPORTANT — Telegram privacy mode:
@@ -16,10 +17,12 @@ IMPORTANT — Telegram privacy mode:
 
 import asyncio
 import logging
+from zoneinfo import ZoneInfo
 
-import pytz
+import orjson
 from aiogram import Bot, Dispatcher, F
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.types import (
@@ -36,8 +39,8 @@ from db import Database
 from handlers.admin import router as admin_router
 from handlers.participant import router as participant_router
 from handlers.poll import router as poll_router
-from jobs import schedule_group_jobs
-from middleware import GroupRegistrationMiddleware
+from jobs import schedule_global_jobs, schedule_group_jobs
+from middleware import GroupRegistrationMiddleware, SendThrottleMiddleware
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,7 +48,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-TZ = pytz.timezone(TIMEZONE)
+TZ = ZoneInfo(TIMEZONE)
+
+
+def make_session() -> AiohttpSession:
+    """HTTP session for the Bot; encodes and decodes Bot API JSON with orjson."""
+    return AiohttpSession(
+        json_loads=orjson.loads,
+        json_dumps=lambda value: orjson.dumps(value).decode(),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -106,7 +117,6 @@ async def on_private_start(message: Message) -> None:
         "• Әр дүйсенбі сайын апталық кесте жарияланады\n\n"
         "<b>⚠️ Маңызды:</b> @BotFather-де privacy mode <b>өшірулі</b> болуы керек, "
         "әйтпесе бот топтағы хабарларды көре алмайды.",
-        parse_mode="HTML",
     )
 
 
@@ -137,8 +147,14 @@ async def main() -> None:
 
     bot = Bot(
         token=BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        session=make_session(),
+        # The only links the bot sends are t.me poll links; never preview them.
+        default=DefaultBotProperties(
+            parse_mode=ParseMode.HTML,
+            link_preview_is_disabled=True,
+        ),
     )
+    bot.session.middleware(SendThrottleMiddleware())
 
     dp = Dispatcher()
 
@@ -168,6 +184,7 @@ async def main() -> None:
             reminder_time=row["reminder_time"],
         )
     logger.info("Restored %d active challenge(s) from database.", len(active))
+    schedule_global_jobs(scheduler, bot, db)
 
     scheduler.start()
 
@@ -181,7 +198,11 @@ async def main() -> None:
             bot,
             db=db,
             scheduler=scheduler,
+            # message, poll_answer and my_chat_member — what the routers use.
             allowed_updates=dp.resolve_used_update_types(),
+            # Long-poll closer to Telegram's maximum: fewer empty getUpdates
+            # round-trips while the groups are quiet.
+            polling_timeout=50,
         )
     finally:
         scheduler.shutdown(wait=False)
@@ -4,14 +4,27 @@ Middleware and filters for the reading-challenge bot.
 ParticipantResolverMiddleware  — passively resolves pending participants
                                  whenever they send any message in the group.
 IsGroup                        — filter: only allow group/supergroup messages.
-IsAdmin                        — filter: only allow chat administrators/creators.
+LooksLikeCommand               — filter: text/caption starts with "/"; a cheap
+                                 router-level gate before the Command filters.
+IsAdmin                        — filter: only allow chat administrators/creators
+                                 (lookups cached for ADMIN_CACHE_TTL seconds).
+SendThrottleMiddleware         — outgoing-request middleware pacing sends to
+                                 Telegram's bot-wide rate limit.
 """
 
+import asyncio
 import logging
-from typing import Any, Awaitable, Callable, Dict
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
 
 from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
 from aiogram.filters import BaseFilter
+from aiogram.methods import Response, SendMessage, SendPoll, TelegramMethod
+from aiogram.methods.base import TelegramType
 from aiogram.types import Message
 
 from db import Database
@@ -30,17 +43,45 @@ class IsGroup(BaseFilter):
         return message.chat.type in ("group", "supergroup")
 
 
+class LooksLikeCommand(BaseFilter):
+    """
+    Passes when the text or caption starts with "/".  Used as a router-level
+    filter so ordinary chat skips every Command() parse in the router.
+    """
+
+    async def __call__(self, message: Message) -> bool:
+        return (message.text or message.caption or "").startswith("/")
+
+
+# (chat_id, user_id) -> (expires_at, is_admin).  Admin rights change rarely,
+# so a short TTL saves a getChatMember round-trip per admin command.
+ADMIN_CACHE_TTL = 60.0
+_admin_cache: Dict[Tuple[int, int], Tuple[float, bool]] = {}
+
+
 class IsAdmin(BaseFilter):
     """Passes only when the sender is a chat administrator or creator."""
 
     async def __call__(self, message: Message, bot: Bot) -> bool:
         if message.chat.type not in ("group", "supergroup"):
             return False
+        if message.from_user is None:
+            return False
+        key = (message.chat.id, message.from_user.id)
+        now = time.monotonic()
+        cached = _admin_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
         try:
-            member = await bot.get_chat_member(message.chat.id, message.from_user.id)
-            return member.status in ("administrator", "creator")
+            member = await bot.get_chat_member(*key)
         except Exception:
-            return False
+            return False                # not cached: retry on the next command
+        is_admin = member.status in ("administrator", "creator")
+        if len(_admin_cache) >= 1024:
+            for k in [k for k, (exp, _) in _admin_cache.items() if exp <= now]:
+                del _admin_cache[k]
+        _admin_cache[key] = (now + ADMIN_CACHE_TTL, is_admin)
+        return is_admin
 
 
 # ---------------------------------------------------------------------------
@@ -80,3 +121,50 @@ class GroupRegistrationMiddleware(BaseMiddleware):
                     )
 
         return await handler(event, data)
+
+
+# ---------------------------------------------------------------------------
+# Outgoing request middleware
+# ---------------------------------------------------------------------------
+
+class SendThrottleMiddleware(BaseRequestMiddleware):
+    """
+    Token bucket in front of sendMessage / sendPoll.  Telegram allows about
+    30 messages per second per bot; pacing here is far cheaper than eating
+    429s and their retry_after.  Other methods (getUpdates, getChatMember …)
+    pass straight through.
+    """
+
+    THROTTLED = (SendMessage, SendPoll)
+
+    def __init__(self, rate: float = 30.0, burst: int = 30) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated:
+                    self._tokens = min(
+                        self.burst, self._tokens + (now - self._updated) * self.rate
+                    )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if isinstance(method, self.THROTTLED):
+            await self._acquire()
+        return await make_request(bot, method)
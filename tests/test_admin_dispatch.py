@@ -0,0 +1,105 @@
+"""
+Admin commands fed through a real Dispatcher, with the Bot API session
+replaced by a recorder.  Run with: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetChatMember, SendMessage
+from aiogram.types import ChatMemberAdministrator, Message, Update
+
+from db import Database
+from handlers.admin import router as admin_router
+
+GROUP_ID = -1001234567890
+ADMIN_ID = 42
+
+
+class RecordingSession(BaseSession):
+    """Answers getChatMember as an admin and echoes sent messages back."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[str] = []
+
+    async def make_request(self, bot, method, timeout=None):
+        if isinstance(method, GetChatMember):
+            return ChatMemberAdministrator.model_validate({
+                "status": "administrator",
+                "user": {"id": method.user_id, "is_bot": False, "first_name": "Admin"},
+                "can_be_edited": False, "is_anonymous": False,
+                "can_manage_chat": True, "can_delete_messages": True,
+                "can_manage_video_chats": True, "can_restrict_members": True,
+                "can_promote_members": True, "can_change_info": True,
+                "can_invite_users": True, "can_post_stories": True,
+                "can_edit_stories": True, "can_delete_stories": True,
+            })
+        if isinstance(method, SendMessage):
+            self.sent.append(method.text)
+            return Message.model_validate({
+                "message_id": len(self.sent) + 100,
+                "date": datetime.now(timezone.utc),
+                "chat": {"id": method.chat_id, "type": "supergroup", "title": "G"},
+                "text": method.text,
+            })
+        raise AssertionError(f"unexpected API call {type(method).__name__}")
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def command_update(text: str) -> Update:
+    return Update.model_validate({
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": datetime.now(timezone.utc),
+            "chat": {"id": GROUP_ID, "type": "supergroup", "title": "G"},
+            "from": {"id": ADMIN_ID, "is_bot": False, "first_name": "Admin"},
+            "text": text,
+        },
+    })
+
+
+class WeeklySummaryNowTest(unittest.TestCase):
+    def test_posts_ack_and_preview(self) -> None:
+        asyncio.run(self._run())
+
+    async def _run(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "test.db"))
+            await db.connect()
+            try:
+                await db.get_or_create_group(GROUP_ID, "G")
+                await db.upsert_participant(GROUP_ID, 7, "reader", "Reader")
+
+                session = RecordingSession()
+                bot = Bot("123456:TEST", session=session)
+                dp = Dispatcher()
+                dp.include_router(admin_router)
+
+                await dp.feed_update(bot, command_update("/weekly_summary_now"), db=db)
+            finally:
+                await db.close()
+
+        self.assertEqual(len(session.sent), 2, session.sent)
+        self.assertIn("Generating current-week preview", session.sent[0])
+        self.assertIn("Current-week preview", session.sent[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
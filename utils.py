@@ -1,13 +1,18 @@
+import time
 from datetime import date, timedelta, datetime
-from typing import Optional
-import pytz
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo
 
 from config import TIMEZONE
 
-TZ = pytz.timezone(TIMEZONE)
+TZ = ZoneInfo(TIMEZONE)
 
 
 def html_escape(text: str) -> str:
+    # Most names have nothing to escape: three membership scans, no new string.
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
     return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
 
@@ -21,25 +26,115 @@ def format_mention(user_id: Optional[int], username: Optional[str], display_name
     return html_escape(display_name)
 
 
+def format_mentions(rows) -> list[str]:
+    """
+    format_mention over rows whose first three columns are
+    (user_id, username, display_name), in one pass.
+    """
+    esc = html_escape
+    return [
+        f'<a href="tg://user?id={user_id}">{esc(display_name)}</a>'
+        if user_id
+        else f"@{username}" if username
+        else esc(display_name)
+        for user_id, username, display_name in (p[:3] for p in rows)
+    ]
+
+
+# Rank prefixes for leaderboard lines; ranks past the table fall back to "N.".
+RANK_LABELS = ("🥇", "🥈", "🥉") + tuple(f"{n}." for n in range(4, 201))
+
+
+def format_standings(
+    rows, days: int, warn_missed: bool = False, bullet: Optional[str] = None
+) -> str:
+    """
+    Render leaderboard rows as "rank mention — yes/days (rate%)" lines, with 🔥
+    for a perfect run and, if warn_missed, ⚠️ for 4+ missed days.  Past the
+    medals, ranks are numbered unless a bullet is given.
+    """
+    n_labels = 3 if bullet else len(RANK_LABELS)
+    labels = (
+        RANK_LABELS[i] if i < n_labels else bullet or f"{i + 1}."
+        for i in range(len(rows))
+    )
+    # Rows come from SQL_RANGE_LEADERBOARD: yes/no/missed are columns 3-5.
+    return "\n".join(
+        f"{label} {mention} — {yes}/{days} "
+        f"({yes / days * 100 if days > 0 else 0:.0f}%)"
+        f"{' 🔥' if yes == days else ''}"
+        f"{' ⚠️' if warn_missed and missed >= 4 else ''}"
+        for label, mention, (yes, _, missed) in zip(
+            labels, format_mentions(rows), (p[3:6] for p in rows)
+        )
+    )
+
+
+# Telegram rejects messages over 4096 characters; leave headroom for the
+# markup, which counts against the raw length but not the rendered one.
+MESSAGE_CHUNK_LEN = 3500
+
+
+def chunk_lines(lines: Iterable[str], max_len: int = MESSAGE_CHUNK_LEN) -> Iterator[str]:
+    """
+    Greedily pack lines into "\n"-joined chunks of at most max_len characters.
+    A single line longer than max_len gets a chunk of its own (HTML tags must
+    not be cut in half).
+    """
+    chunk: list[str] = []
+    size = 0
+    for line in lines:
+        if chunk and size + 1 + len(line) > max_len:
+            yield "\n".join(chunk)
+            chunk = []
+        size = size + 1 + len(line) if chunk else len(line)
+        chunk.append(line)
+    if chunk:
+        yield "\n".join(chunk)
+
+
+async def reply_chunked(msg, text: str, *, reply: bool = True, **kwargs) -> None:
+    """
+    Send text to msg's chat, split with chunk_lines when it is too long.
+    The first chunk is a reply to msg (unless reply=False); the rest follow
+    in order.  kwargs (parse_mode …) apply to every chunk.
+    """
+    if len(text) <= MESSAGE_CHUNK_LEN:
+        await (msg.reply if reply else msg.answer)(text, **kwargs)
+        return
+    for i, chunk in enumerate(chunk_lines(text.split("\n"))):
+        await (msg.reply if reply and i == 0 else msg.answer)(chunk, **kwargs)
+
+
 def get_almaty_now() -> datetime:
     return datetime.now(TZ)
 
 
+# (unix second, Almaty date at that second).  Almaty's offset is a whole
+# number of hours, so the date can't change within one wall-clock second.
+_today_cache: tuple[int, date] = (-1, date.min)
+
+
 def get_almaty_today() -> date:
-    return datetime.now(TZ).date()
+    global _today_cache
+    sec = int(time.time())
+    if _today_cache[0] != sec:
+        _today_cache = (sec, datetime.fromtimestamp(sec, TZ).date())
+    return _today_cache[1]
 
 
-def get_current_week_bounds() -> tuple[date, date]:
-    """Return (Monday, Sunday) of the current week in Almaty time."""
-    today = get_almaty_today()
+# The bounds only change at midnight: each is computed once per day and
+# then served from a small LRU keyed on the date (room for a day rollover).
+
+@lru_cache(maxsize=4)
+def _week_bounds_for(today: date) -> tuple[date, date]:
     week_start = today - timedelta(days=today.weekday())   # Monday
     week_end = week_start + timedelta(days=6)              # Sunday
     return week_start, week_end
 
 
-def get_current_month_bounds() -> tuple[date, date]:
-    """Return (first day, last day) of the current month in Almaty time."""
-    today = get_almaty_today()
+@lru_cache(maxsize=4)
+def _month_bounds_for(today: date) -> tuple[date, date]:
     month_start = today.replace(day=1)
     if today.month == 12:
         month_end = date(today.year + 1, 1, 1) - timedelta(days=1)
@@ -48,21 +143,37 @@ def get_current_month_bounds() -> tuple[date, date]:
     return month_start, month_end
 
 
-def get_prev_week_bounds() -> tuple[date, date]:
-    """Return (Monday, Sunday) of the previous week in Almaty time."""
-    today = get_almaty_today()
+@lru_cache(maxsize=4)
+def _prev_week_bounds_for(today: date) -> tuple[date, date]:
     current_monday = today - timedelta(days=today.weekday())
     prev_monday = current_monday - timedelta(days=7)
     prev_sunday = current_monday - timedelta(days=1)
     return prev_monday, prev_sunday
 
 
+def get_current_week_bounds(today: Optional[date] = None) -> tuple[date, date]:
+    """Return (Monday, Sunday) of the current week in Almaty time.
+
+    Callers that already hold today's date pass it to skip another clock read.
+    """
+    return _week_bounds_for(today or get_almaty_today())
+
+
+def get_current_month_bounds(today: Optional[date] = None) -> tuple[date, date]:
+    """Return (first day, last day) of the current month in Almaty time."""
+    return _month_bounds_for(today or get_almaty_today())
+
+
+def get_prev_week_bounds(today: Optional[date] = None) -> tuple[date, date]:
+    """Return (Monday, Sunday) of the previous week in Almaty time."""
+    return _prev_week_bounds_for(today or get_almaty_today())
+
+
 def make_poll_link(group_id: int, message_id: int) -> Optional[str]:
     """Build a t.me deep link for a supergroup message. Returns None for basic groups."""
-    gid_str = str(group_id)
-    if gid_str.startswith("-100"):
-        channel_id = gid_str[4:]          # strip the -100 prefix
-        return f"https://t.me/c/{channel_id}/{message_id}"
+    # Supergroup ids are -(10**12 + channel_id), i.e. "-100" + channel_id.
+    if group_id < -1_000_000_000_000:
+        return f"https://t.me/c/{-group_id - 1_000_000_000_000}/{message_id}"
     return None
 
 
@@ -74,4 +185,5 @@ def days_since_join(joined_at_iso: str, week_start: date) -> int:
         return 7
     effective_start = max(joined, week_start)
     today = get_almaty_today()
-    return max(1, (today - effective_start).days + 1)
+    # A stale week_start must not push the count past the week.
+    return max(1, min(7, (today - effective_start).days + 1))